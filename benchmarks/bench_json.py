@@ -0,0 +1,92 @@
+# benchmarks/bench_json.py
+#
+# Membandingkan serialisasi body list product dan distributor memakai
+# flask.jsonify lama (stdlib, indentasi) dengan JSONProvider
+# (stdlib ringkas dan orjson bila terpasang), serta format kolom
+# (JSON dan MessagePack) yang bisa diminta lewat header Accept.
+#
+# $ python benchmarks/bench_json.py [jumlah_baris]
+
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import json
+
+from project.server import app, db
+from project.server.catalog import product_listing, distributor_listing
+from project.server.encoding import (
+    JSONProvider, JSONEncoder, orjson, msgpack, packb
+)
+from project.server.models import Product, Distributor
+
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('BENCH_DATABASE_URL', 'sqlite://')
+
+
+def provider(backend):
+    json_provider = JSONProvider()
+    json_provider.init_app(app)
+    json_provider.backend = backend
+    return json_provider
+
+
+def load(listing):
+    query = listing.query(listing.names)
+    return query.order_by(listing.model.id).all()
+
+
+def measure(name, fn, rows, repeat=5):
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('  %-14s %8.2f us/row %8.1f B/row' % (
+        name, best * 1e6 / rows, size / float(rows)))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    candidates = [
+        ('flask-indent', lambda isi: json.dumps(
+            isi, cls=JSONEncoder, indent=2, separators=(', ', ': '),
+            sort_keys=True).encode('utf-8')),
+        ('json', provider('json').dumps),
+    ]
+    if orjson is not None:
+        candidates.append(('orjson', provider('orjson').dumps))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(Product.__table__.insert(), [
+            {'nama': 'product %d' % i, 'harga': i, 'jumlah': i}
+            for i in range(rows)
+        ])
+        db.session.execute(Distributor.__table__.insert(), [
+            {'perusahaan': 'perusahaan %d' % i, 'barang': 'barang %d' % i}
+            for i in range(rows)
+        ])
+        db.session.commit()
+        print('%d rows' % rows)
+        for name, listing in (('product', product_listing),
+                              ('distributor', distributor_listing)):
+            data = load(listing)
+            serialize = listing.serializer(listing.names)
+            print(name)
+            for label, dumps in candidates:
+                measure(label, lambda: dumps([serialize(row) for row in data]), rows)
+            measure('columnar', lambda: candidates[-1][1](
+                listing.columnar(listing.names, data)), rows)
+            if msgpack is not None:
+                measure('msgpack', lambda: packb(
+                    listing.columnar(listing.names, data)), rows)
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
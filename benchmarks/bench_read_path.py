@@ -0,0 +1,79 @@
+# benchmarks/bench_read_path.py
+#
+# Membandingkan read path lama (Product.query.all() + objek ORM) dengan
+# read path kolom (tuple) yang dipakai /product/list.
+#
+# $ python benchmarks/bench_read_path.py [jumlah_baris]
+
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project.server import app, db
+from project.server.models import Product
+from project.server.catalog import product_listing
+
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('BENCH_DATABASE_URL', 'sqlite://')
+
+
+def orm_rows():
+    isi = []
+    for tampil in Product.query.all():
+        isi.append({
+            'status': 'success',
+            'data': {
+                'product_id': tampil.id,
+                'nama': tampil.nama,
+                'harga': tampil.harga,
+                'jumlah': tampil.jumlah,
+            }
+        })
+    return isi
+
+
+def column_rows():
+    serialize = product_listing.serializer(product_listing.names)
+    query = product_listing.query(product_listing.names)
+    return [serialize(row) for row in query.order_by(Product.id).all()]
+
+
+def measure(name, fn, rows, repeat=5):
+    best = None
+    for _ in range(repeat):
+        db.session.remove()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    db.session.remove()
+    tracemalloc.start()
+    fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    print('%-8s %8.2f us/row %8.0f B/row peak' % (
+        name, best * 1e6 / rows, peak / float(rows)))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(Product.__table__.insert(), [
+            {'nama': 'product %d' % i, 'harga': i, 'jumlah': i}
+            for i in range(rows)
+        ])
+        db.session.commit()
+        print('%d rows' % rows)
+        measure('orm', orm_rows, rows)
+        measure('columns', column_rows, rows)
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
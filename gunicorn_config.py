@@ -0,0 +1,60 @@
+# gunicorn_config.py
+#
+# $ gunicorn -c gunicorn_config.py project.server:app
+
+
+import os
+import shutil
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+# worker thread: request lain tetap dilayani selama satu thread menunggu
+# bcrypt, dan antrian hashing (PASSWORD_HASH_WORKERS + QUEUE_SIZE) bisa
+# penuh sehingga login berikutnya dijawab 503. Jumlah thread harus lebih
+# besar dari batas antrian itu dan tidak melebihi pool koneksi database.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 12))
+
+# folder metric sementara yang dibuat oleh on_starting
+created_metrics_dir = None
+
+
+def post_fork(server, worker):
+    # koneksi dari proses master (bila --preload) tidak boleh dipakai bersama,
+    # lalu pool worker diisi sebelum menerima request
+    from project.server import pool_monitor, replica_router
+    pool_monitor.dispose()
+    replica_router.dispose()
+    opened = pool_monitor.warm_up()
+    server.log.info('Worker %s opened %d database connections', worker.pid, opened)
+
+
+def on_starting(server):
+    global created_metrics_dir
+    from project.multiprocess import clear_directory
+    # tanpa METRICS_DIR /metrics hanya melihat satu worker, jadi dibuatkan
+    # folder sementara sebelum fork (worker membaca environment ini)
+    metrics_dir = os.getenv('METRICS_DIR')
+    if not metrics_dir:
+        os.environ['METRICS_DIR'] = created_metrics_dir = tempfile.mkdtemp(
+            prefix='flask_jwt_metrics_')
+    # file metric dari run sebelumnya tidak boleh ikut dijumlahkan
+    elif os.path.isdir(metrics_dir):
+        clear_directory(metrics_dir)
+
+
+def child_exit(server, worker):
+    # counter worker yang berhenti tetap dihitung, gauge-nya dibuang.
+    # berjalan di master, jadi tidak boleh mengimport aplikasi
+    from project.multiprocess import mark_process_dead
+    try:
+        mark_process_dead(os.environ['METRICS_DIR'], worker.pid)
+    except Exception:
+        server.log.exception('Failed to mark metrics of worker %s dead', worker.pid)
+
+
+def on_exit(server):
+    # folder sementara yang dibuat on_starting dihapus
+    if created_metrics_dir:
+        shutil.rmtree(created_metrics_dir, ignore_errors=True)
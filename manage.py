@@ -69,6 +69,20 @@ def drop_db():
     db.drop_all()
 
 
+@manager.command
+def prune_blacklist(batch_size=1000):
+    """Menghapus token blacklist yang sudah expired"""
+    deleted = models.BlacklistToken.prune_expired(int(batch_size))
+    print('Deleted %d expired blacklist tokens.' % deleted)
+
+
+@manager.command
+def prune_refresh_tokens(batch_size=1000):
+    """Menghapus refresh token yang sudah expired"""
+    deleted = models.RefreshToken.prune_expired(int(batch_size))
+    print('Deleted %d expired refresh tokens.' % deleted)
+
+
 if __name__ == '__main__':
 #    app.run(host=$HOST, port=$PORT)
   #  port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,73 @@
+"""blacklist token disimpan sebagai digest beserta waktu expired,
+serta index blacklisted_on untuk sinkronisasi index blacklist
+
+Revision ID: 3f1a9c2e7b44
+Revises: 
+Create Date: 2026-10-18 07:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import datetime
+import hashlib
+import jwt
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2e7b44'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+blacklist_tokens = sa.table(
+    'blacklist_tokens',
+    sa.column('id', sa.Integer),
+    sa.column('token', sa.String),
+    sa.column('token_hash', sa.String),
+    sa.column('expires_at', sa.DateTime),
+)
+
+
+def token_expiry(token):
+    try:
+        payload = jwt.decode(token, verify=False)
+        return datetime.datetime.utcfromtimestamp(int(payload['exp']))
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return datetime.datetime.utcnow()
+
+
+def upgrade():
+    op.add_column('blacklist_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    op.add_column('blacklist_tokens', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select([blacklist_tokens.c.id, blacklist_tokens.c.token])
+    ).fetchall()
+    for row in rows:
+        conn.execute(
+            blacklist_tokens.update().where(
+                blacklist_tokens.c.id == row[0]
+            ).values(
+                token_hash=hashlib.sha256(row[1].encode('utf-8')).hexdigest(),
+                expires_at=token_expiry(row[1])
+            )
+        )
+    op.alter_column('blacklist_tokens', 'token_hash', nullable=False)
+    op.alter_column('blacklist_tokens', 'expires_at', nullable=False)
+    op.create_unique_constraint('blacklist_tokens_token_hash_key', 'blacklist_tokens', ['token_hash'])
+    op.create_index('ix_blacklist_tokens_expires_at', 'blacklist_tokens', ['expires_at'], unique=False)
+    op.create_index('ix_blacklist_tokens_blacklisted_on', 'blacklist_tokens', ['blacklisted_on'], unique=False)
+    op.drop_column('blacklist_tokens', 'token')
+
+
+def downgrade():
+    # token asli tidak bisa dikembalikan dari digest
+    op.execute(blacklist_tokens.delete())
+    op.add_column('blacklist_tokens', sa.Column('token', sa.String(length=500), nullable=False))
+    op.create_unique_constraint('blacklist_tokens_token_key', 'blacklist_tokens', ['token'])
+    op.drop_index('ix_blacklist_tokens_blacklisted_on', table_name='blacklist_tokens')
+    op.drop_index('ix_blacklist_tokens_expires_at', table_name='blacklist_tokens')
+    op.drop_constraint('blacklist_tokens_token_hash_key', 'blacklist_tokens', type_='unique')
+    op.drop_column('blacklist_tokens', 'expires_at')
+    op.drop_column('blacklist_tokens', 'token_hash')
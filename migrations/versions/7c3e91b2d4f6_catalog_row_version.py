@@ -0,0 +1,34 @@
+"""kolom version pada products dan distributors, index (version, id)
+untuk sinkronisasi perubahan menggantikan (updated_at, id)
+
+Revision ID: 7c3e91b2d4f6
+Revises: b81e37d5a902
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e91b2d4f6'
+down_revision = 'b81e37d5a902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('products', 'distributors'):
+        # baris lama mendapat versi 0, dikirim di halaman pertama /changes
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False,
+                                       server_default='0'))
+        op.alter_column(table, 'version', server_default=None)
+        op.create_index('ix_{}_version_id'.format(table), table, ['version', 'id'], unique=False)
+        op.drop_index('ix_{}_updated_at_id'.format(table), table_name=table)
+
+
+def downgrade():
+    for table in ('products', 'distributors'):
+        op.create_index('ix_{}_updated_at_id'.format(table), table, ['updated_at', 'id'], unique=False)
+        op.drop_index('ix_{}_version_id'.format(table), table_name=table)
+        op.drop_column(table, 'version')
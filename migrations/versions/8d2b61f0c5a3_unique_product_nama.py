@@ -0,0 +1,29 @@
+"""unique index pada products.nama
+
+Revision ID: 8d2b61f0c5a3
+Revises: 3f1a9c2e7b44
+Create Date: 2026-10-18 07:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2b61f0c5a3'
+down_revision = '3f1a9c2e7b44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # hapus duplikat yang sudah terlanjur masuk, simpan baris pertama
+    op.execute(
+        'DELETE FROM products WHERE id NOT IN '
+        '(SELECT MIN(id) FROM products GROUP BY nama)'
+    )
+    op.create_index('ix_products_nama', 'products', ['nama'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_products_nama', table_name='products')
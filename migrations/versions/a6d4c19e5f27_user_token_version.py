@@ -0,0 +1,25 @@
+"""users.token_version untuk mencabut token yang membawa claims
+
+Revision ID: a6d4c19e5f27
+Revises: f29c7d4e8a10
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d4c19e5f27'
+down_revision = 'f29c7d4e8a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False,
+                                     server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,29 @@
+"""unique index pada distributors (perusahaan, barang)
+
+Revision ID: c47e0a9d13b8
+Revises: 8d2b61f0c5a3
+Create Date: 2026-10-18 07:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e0a9d13b8'
+down_revision = '8d2b61f0c5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # hapus duplikat yang sudah terlanjur masuk, simpan baris pertama
+    op.execute(
+        'DELETE FROM distributors WHERE id NOT IN '
+        '(SELECT MIN(id) FROM distributors GROUP BY perusahaan, barang)'
+    )
+    op.create_index('ix_distributors_perusahaan_barang', 'distributors', ['perusahaan', 'barang'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_distributors_perusahaan_barang', table_name='distributors')
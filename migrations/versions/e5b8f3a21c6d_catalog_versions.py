@@ -0,0 +1,38 @@
+"""updated_at pada products dan distributors, tabel catalog_versions
+
+Revision ID: e5b8f3a21c6d
+Revises: c47e0a9d13b8
+Create Date: 2026-10-18 07:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8f3a21c6d'
+down_revision = 'c47e0a9d13b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('products', 'distributors'):
+        # baris lama diisi dengan waktu migrasi
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                       server_default=sa.text("(now() at time zone 'utc')")))
+        op.alter_column(table, 'updated_at', server_default=None)
+        op.create_index('ix_{}_updated_at'.format(table), table, ['updated_at'], unique=False)
+    op.create_table('catalog_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
+    for table in ('products', 'distributors'):
+        op.drop_index('ix_{}_updated_at'.format(table), table_name=table)
+        op.drop_column(table, 'updated_at')
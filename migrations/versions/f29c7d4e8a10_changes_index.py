@@ -0,0 +1,28 @@
+"""index (updated_at, id) untuk sinkronisasi perubahan
+
+Revision ID: f29c7d4e8a10
+Revises: e5b8f3a21c6d
+Create Date: 2026-10-18 07:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f29c7d4e8a10'
+down_revision = 'e5b8f3a21c6d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('products', 'distributors'):
+        op.create_index('ix_{}_updated_at_id'.format(table), table, ['updated_at', 'id'], unique=False)
+        op.drop_index('ix_{}_updated_at'.format(table), table_name=table)
+
+
+def downgrade():
+    for table in ('products', 'distributors'):
+        op.create_index('ix_{}_updated_at'.format(table), table, ['updated_at'], unique=False)
+        op.drop_index('ix_{}_updated_at_id'.format(table), table_name=table)
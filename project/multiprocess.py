@@ -0,0 +1,53 @@
+# project/multiprocess.py
+#
+# Fungsi file metric per worker yang juga dipanggil dari proses master
+# gunicorn (gunicorn_config.py). Modul ini sengaja berada di luar
+# project.server dan tanpa import aplikasi, supaya master tidak ikut
+# membuat aplikasi Flask.
+
+
+import glob
+import json
+import os
+import re
+
+
+def metrics_path(directory, pid):
+    """ Ini untuk path file metric milik satu proses """
+    return os.path.join(directory, 'metrics_{}.json'.format(pid))
+
+
+def metrics_files(directory):
+    """ Ini untuk semua file metric di folder """
+    return glob.glob(os.path.join(directory, 'metrics_*.json'))
+
+
+def clear_directory(directory):
+    """
+    Ini untuk menghapus file metric dari run sebelumnya, dipanggil saat
+    gunicorn start
+    """
+    for path in metrics_files(directory):
+        os.remove(path)
+
+
+def mark_process_dead(directory, pid):
+    """
+    Ini untuk worker yang sudah berhenti: counter dan histogram tetap
+    dijumlahkan, gauge miliknya (series dengan label pid) dibuang.
+    Dipanggil dari child_exit gunicorn.
+    """
+    path = metrics_path(directory, pid)
+    try:
+        with open(path) as f:
+            samples = json.load(f)
+    except (IOError, ValueError):
+        return
+    own_label = re.compile(r'[{{,]pid="{}"[,}}]'.format(pid))
+    samples = {
+        series: value for series, value in samples.items()
+        if not own_label.search(series)
+    }
+    with open(path + '.tmp', 'w') as f:
+        json.dump(samples, f)
+    os.replace(path + '.tmp', path)
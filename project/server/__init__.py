@@ -3,21 +3,50 @@
 import os
 
 from flask import Flask
-from flask_bcrypt import Bcrypt
-from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 
+from project.server.cache import ResponseCache
+from project.server.compression import Compress
+from project.server.encoding import JSONProvider
+from project.server.hashing import PasswordHasher
+from project.server.keys import KeyRing
+from project.server.metrics import (
+    Metrics, cache_collector, pool_collector, request_collector
+)
+from project.server.pool import PoolMonitor
+from project.server.profiler import QueryProfiler
+from project.server.routing import ReplicaRouter, RoutingSQLAlchemy
+from project.server.timing import RequestTiming
+from project.server.tokens import TokenCache
+
 app = Flask(__name__)
-CORS(app)
+# header custom harus diekspos supaya bisa dibaca dashboard di origin lain
+CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'Server-Timing'])
 
 app_settings = os.getenv(
     'APP_SETTINGS',
     'project.server.config.DevelopmentConfig'
 )
 app.config.from_object(app_settings)
+json_provider = JSONProvider(app)
+compress = Compress(app)
+request_timing = RequestTiming(app)
 
-bcrypt = Bcrypt(app)
-db = SQLAlchemy(app)
+password_hasher = PasswordHasher(app)
+db = RoutingSQLAlchemy(app)
+pool_monitor = PoolMonitor(db, app)
+query_profiler = QueryProfiler(app)
+replica_router = ReplicaRouter(db, app)
+token_cache = TokenCache(app)
+key_ring = KeyRing(app)
+response_cache = ResponseCache(app)
+metrics = Metrics(app)
+metrics.add_collector(request_collector(request_timing))
+metrics.add_collector(pool_collector(pool_monitor))
+metrics.add_collector(cache_collector('token', token_cache))
+metrics.add_collector(cache_collector('response', response_cache))
 
 from project.server.auth.views import auth_blueprint
+from project.server.ops.views import ops_blueprint
 app.register_blueprint(auth_blueprint)
+app.register_blueprint(ops_blueprint)
@@ -0,0 +1,95 @@
+# project/server/auth/decorators.py
+
+
+import functools
+
+from flask import g, request, make_response
+
+from project.server import db
+from project.server.encoding import jsonify
+from project.server.models import User
+from project.server.timing import phase
+
+
+def auth_fail_response(message, status):
+    responseObject = {
+        'status': 'fail',
+        'message': message
+    }
+    return make_response(jsonify(responseObject)), status
+
+
+def reset_identity():
+    """
+    Ini untuk menghapus identitas request sebelumnya dari flask.g, karena
+    satu app context bisa dipakai oleh beberapa request (misalnya saat test)
+    """
+    for name in ('user_id', 'auth_token', 'token_payload', 'user'):
+        g.pop(name, None)
+
+
+def authenticate():
+    """
+    Ini untuk memeriksa header Authorization satu kali per request.
+    Hasilnya disimpan di flask.g (g.user_id, g.auth_token dan
+    g.token_payload) sehingga
+    pemanggilan berikutnya di request yang sama tidak men-decode token lagi.
+    :return: response error|None
+    """
+    if 'user_id' in g:
+        return None
+    auth_header = request.headers.get('Authorization')
+    if auth_header:
+        try:
+            auth_token = auth_header.split(" ")[1]
+        except IndexError:
+            return auth_fail_response('Bearer token malformed.', 401)
+    else:
+        auth_token = ''
+    if not auth_token:
+        # endpoint yang menerima inputan membalas 403 bila token tidak ada
+        status = 401 if request.method in ('GET', 'HEAD') else 403
+        return auth_fail_response('Provide a valid auth token.', status)
+    with phase('auth'):
+        payload = User.decode_auth_payload(auth_token)
+    if isinstance(payload, str):
+        return auth_fail_response(payload, 401)
+    g.user_id = payload['sub']
+    g.auth_token = auth_token
+    g.token_payload = payload
+    return None
+
+
+def token_required(view):
+    """
+    Ini decorator untuk view yang diproteksi dengan token, request ditolak
+    sebelum ada pekerjaan database di dalam view
+    """
+    @functools.wraps(view)
+    def decorated(*args, **kwargs):
+        error = authenticate()
+        if error is not None:
+            return error
+        return view(*args, **kwargs)
+    return decorated
+
+
+def current_user():
+    """
+    Ini untuk mengambil objek user dari token request ini,
+    query ke tabel users hanya dilakukan sekali per request
+    :return: User|None bila user sudah tidak ada
+    """
+    if 'user' not in g:
+        # user yang baru register bisa belum ada di replica
+        with db.session().primary():
+            g.user = User.query.filter_by(id=g.user_id).first()
+    return g.user
+
+
+def current_claims():
+    """
+    Ini untuk mengambil claims user dari token request ini tanpa query
+    :return: dict|None bila token tidak membawa claims
+    """
+    return User.user_claims(g.token_payload)
@@ -1,13 +1,135 @@
 # project/server/auth/views.py
 
 
-from flask import Blueprint, request, make_response, jsonify
+import hashlib
+
+from flask import (
+    Blueprint, Response, g, request, make_response, stream_with_context
+)
 from flask.views import MethodView
 
-from project.server import bcrypt, db
-from project.server.models import User, BlacklistToken, Product, Distributor
+from project.server import (
+    app, db, json_provider, key_ring, password_hasher, response_cache,
+    token_cache
+)
+from project.server.auth.decorators import (
+    token_required, auth_fail_response, current_claims, current_user,
+    reset_identity
+)
+from project.server.cache import pack_response, unpack_response
+from project.server.catalog import (
+    parse_page_args, parse_limit, parse_changes_cursor, keyset_page,
+    export_rows, current_version, product_listing, distributor_listing
+)
+from project.server.encoding import (
+    jsonify, negotiate, packb, JSON_MIMETYPE, MSGPACK_MIMETYPE
+)
+from project.server.hashing import HashingBusy
+from project.server.ingest import (
+    parse_bulk_body, bulk_insert_products, bulk_insert_distributors,
+    insert_ignore, bump_version, validate_product, validate_distributor
+)
+from project.server.models import (
+    User, BlacklistToken, RefreshToken, Product, Distributor
+)
+from project.server.timing import phase
 
 auth_blueprint = Blueprint('auth', __name__)
+auth_blueprint.before_app_request(reset_identity)
+
+
+def busy_response():
+    # antrian hashing password penuh, client diminta mencoba lagi
+    responseObject = {
+        'status': 'fail',
+        'message': 'Server is busy. Please try again.'
+    }
+    return make_response(jsonify(responseObject)), 503, {'Retry-After': '1'}
+
+
+def invalid_query_response(message):
+    responseObject = {
+        'status': 'fail',
+        'message': message
+    }
+    return make_response(jsonify(responseObject)), 400
+
+
+def list_response(listing, mimetype=JSON_MIMETYPE):
+    # membaca satu halaman data hanya dengan kolom yang diminta
+    try:
+        limit, after_id = parse_page_args(request.args)
+    except ValueError:
+        return invalid_query_response('Invalid pagination parameters.')
+    try:
+        fields = listing.parse_fields(request.args)
+    except ValueError:
+        return invalid_query_response('Invalid fields parameter.')
+    rows, next_cursor = keyset_page(
+        listing.query(fields), listing.model.id, after_id, limit
+    )
+    with phase('serialize'):
+        if mimetype == JSON_MIMETYPE:
+            serialize = listing.serializer(fields)
+            body = json_provider.dumps([serialize(row) for row in rows])
+        elif mimetype == MSGPACK_MIMETYPE:
+            body = packb(listing.columnar(fields, rows))
+        else:
+            body = json_provider.dumps(listing.columnar(fields, rows))
+    return page_response(body, next_cursor, mimetype), 200
+
+
+def conditional_list_response(listing):
+    # format response dipilih dari header Accept, JSON per baris sebagai default
+    mimetype = negotiate(request.accept_mimetypes)
+    # bila versi tabel belum berubah langsung balas 304 tanpa membaca data
+    version, updated_at = current_version(listing.model.__tablename__)
+    etag = '{}-{}-{}'.format(
+        listing.model.__tablename__, version,
+        hashlib.md5(
+            mimetype.encode('utf-8') + b'?' + request.query_string
+        ).hexdigest()[:16]
+    )
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = (
+            updated_at is not None and
+            request.if_modified_since is not None and
+            updated_at.replace(microsecond=0) <= request.if_modified_since
+        )
+    if not_modified:
+        response = make_response('', 304)
+    else:
+        # body yang sama untuk versi, format dan parameter yang sama diambil dari cache
+        name = listing.model.__tablename__
+        cache_key = '{}:{}:{}'.format(
+            version, mimetype, request.query_string.decode('utf-8'))
+        cached = response_cache.get(name, cache_key)
+        if cached is not None:
+            mimetype, next_cursor, body = unpack_response(cached)
+            response = page_response(body, next_cursor, mimetype)
+        else:
+            response, status = list_response(listing, mimetype)
+            if status != 200:
+                return response, status
+            response_cache.set(name, cache_key, pack_response(
+                response.mimetype, response.headers.get('X-Next-Cursor'),
+                response.get_data()
+            ))
+    response.set_etag(etag, weak=True)
+    response.vary.add('Accept')
+    if updated_at is not None:
+        response.last_modified = updated_at
+    return response
+
+
+def page_response(body, next_cursor, mimetype='application/json'):
+    # cursor halaman berikutnya dikirim lewat header supaya isi response tetap sama
+    response = Response(body, mimetype=mimetype)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 
 class RegisterAPI(MethodView):
@@ -31,12 +153,17 @@ class RegisterAPI(MethodView):
                 db.session.commit()
                 # bila input berhasil maka akan menampilkan token
                 auth_token = user.encode_auth_token(user.id)
+                refresh_token = RefreshToken.issue(user)
+                db.session.commit()
                 responseObject = {
                     'status': 'success',
                     'message': 'Successfully registered.',
-                    'auth_token': auth_token.decode()
+                    'auth_token': auth_token.decode(),
+                    'refresh_token': refresh_token
                 }
                 return make_response(jsonify(responseObject)), 201
+            except HashingBusy:
+                return busy_response()
             except Exception as e:
                 responseObject = {
                     'status': 'fail',
@@ -63,15 +190,19 @@ class LoginAPI(MethodView):
             user = User.query.filter_by(
                 email=post_data.get('email')
             ).first()
-            if user and bcrypt.check_password_hash(
+            if user and password_hasher.check(
                 user.password, post_data.get('password')
             ):
                 auth_token = user.encode_auth_token(user.id)
                 if auth_token:
+                    # refresh token dipakai untuk token berikutnya tanpa bcrypt
+                    refresh_token = RefreshToken.issue(user)
+                    db.session.commit()
                     responseObject = {
                         'status': 'success',
                         'message': 'Successfully logged in.',
-                        'auth_token': auth_token.decode()
+                        'auth_token': auth_token.decode(),
+                        'refresh_token': refresh_token
                     }
                     return make_response(jsonify(responseObject)), 200
             else:
@@ -80,6 +211,8 @@ class LoginAPI(MethodView):
                     'message': 'User does not exist.'
                 }
                 return make_response(jsonify(responseObject)), 404
+        except HashingBusy:
+            return busy_response()
         except Exception as e:
             print(e)
             responseObject = {
@@ -89,319 +222,317 @@ class LoginAPI(MethodView):
             return make_response(jsonify(responseObject)), 500
 
 
-class UserAPI(MethodView):
+class RefreshAPI(MethodView):
     """
-    Ini berisi method untuk objek user
+    Ini berisi method untuk menukar refresh token dengan token baru
+    tanpa memeriksa password lagi
     """
-    def get(self):
-        # method ini diproteksi dengan token jadi pertama kali yang harus diambil oleh system adalah token
-        auth_header = request.headers.get('Authorization')
-        if auth_header:
-            try:
-                auth_token = auth_header.split(" ")[1]
-            except IndexError:
-                responseObject = {
-                    'status': 'fail',
-                    'message': 'Bearer token malformed.'
-                }
-                return make_response(jsonify(responseObject)), 401
-        else:
-            auth_token = ''
-        if auth_token:
-            resp = User.decode_auth_token(auth_token)
-            if not isinstance(resp, str):
-                user = User.query.filter_by(id=resp).first()
-                responseObject = {
-                    'status': 'success',
-                    'data': {
-                        'user_id': user.id,
-                        'email': user.email,
-                        'admin': user.admin,
-                        'registered_on': user.registered_on
-                    }
-                }
-                return make_response(jsonify(responseObject)), 200
+    def post(self):
+        post_data = request.get_json(silent=True) or {}
+        result = RefreshToken.rotate(post_data.get('refresh_token'))
+        if isinstance(result, str):
             responseObject = {
                 'status': 'fail',
-                'message': resp
+                'message': result
             }
             return make_response(jsonify(responseObject)), 401
+        user, auth_token, refresh_token = result
+        responseObject = {
+            'status': 'success',
+            'message': 'Successfully refreshed.',
+            'auth_token': auth_token.decode(),
+            'refresh_token': refresh_token
+        }
+        return make_response(jsonify(responseObject)), 200
+
+
+class KeysAPI(MethodView):
+    """
+    Ini berisi method untuk menampilkan kunci publik penandatangan token (JWKS)
+    """
+    def get(self):
+        response = make_response(jsonify(key_ring.jwks()))
+        response.cache_control.public = True
+        response.cache_control.max_age = 300
+        return response, 200
+
+
+class UserAPI(MethodView):
+    """
+    Ini berisi method untuk objek user
+    """
+    # method ini diproteksi dengan token
+    decorators = [token_required]
+
+    def get(self):
+        # token yang membawa claims dijawab tanpa membaca tabel users
+        claims = current_claims()
+        if claims is not None:
+            data = {
+                'user_id': g.user_id,
+                'email': claims['email'],
+                'admin': claims['admin'],
+                'registered_on': claims['registered_on']
+            }
         else:
-            responseObject = {
-                'status': 'fail',
-                'message': 'Provide a valid auth token.'
+            user = current_user()
+            if user is None:
+                return auth_fail_response('User not found. Please log in again.', 401)
+            data = {
+                'user_id': user.id,
+                'email': user.email,
+                'admin': user.admin,
+                'registered_on': user.registered_on
             }
-            return make_response(jsonify(responseObject)), 401
+        responseObject = {
+            'status': 'success',
+            'data': data
+        }
+        return make_response(jsonify(responseObject)), 200
 
 
 class LogoutAPI(MethodView):
     """
     Ini berisi method untuk logout
     """
+    # method ini bisa dijalankan bila login berhasil
+    decorators = [token_required]
+
     def post(self):
-        # method ini bisa dijalankan bila login berhasil 
-        auth_header = request.headers.get('Authorization')
-        if auth_header:
-            auth_token = auth_header.split(" ")[1]
-        else:
-            auth_token = ''
-        if auth_token:
-            resp = User.decode_auth_token(auth_token)
-            if not isinstance(resp, str):
-                # ini untuk menandai bahwa token telah diblacklist
-                blacklist_token = BlacklistToken(token=auth_token)
-                try:
-                    # menginputkan token
-                    db.session.add(blacklist_token)
-                    db.session.commit()
-                    responseObject = {
-                        'status': 'success',
-                        'message': 'Successfully logged out.'
-                    }
-                    return make_response(jsonify(responseObject)), 200
-                except Exception as e:
-                    responseObject = {
-                        'status': 'fail',
-                        'message': e
-                    }
-                    return make_response(jsonify(responseObject)), 200
-            else:
-                responseObject = {
-                    'status': 'fail',
-                    'message': resp
-                }
-                return make_response(jsonify(responseObject)), 401
-        else:
+        # ini untuk menandai bahwa token telah diblacklist
+        post_data = request.get_json(silent=True)
+        if post_data is None:
+            post_data = {}
+        elif not isinstance(post_data, dict):
+            return invalid_query_response('Request body must be an object.')
+        blacklist_token = BlacklistToken(token=g.auth_token)
+        try:
+            # menginputkan token
+            db.session.add(blacklist_token)
+            if post_data.get('refresh_token'):
+                # refresh token milik user ini ikut dicabut
+                RefreshToken.revoke(post_data['refresh_token'], g.user_id)
+            db.session.commit()
+            # token tidak boleh lagi dilayani dari cache
+            token_cache.invalidate(g.auth_token)
+            responseObject = {
+                'status': 'success',
+                'message': 'Successfully logged out.'
+            }
+            return make_response(jsonify(responseObject)), 200
+        except Exception as e:
             responseObject = {
                 'status': 'fail',
-                'message': 'Provide a valid auth token.'
+                'message': e
             }
-            return make_response(jsonify(responseObject)), 403
+            return make_response(jsonify(responseObject)), 200
 
 
 class ProductAPI(MethodView):
     """
     Ini berisi method untuk objek product dan untuk mengakses perlu login terlebih dahulu
     """
-    def post(self):
-        # pertama ambil token
-        auth_header = request.headers.get('Authorization')
-        # bila token belum expired maka inputan bisa dikirim
-        post_data = request.get_json()
-        # sebelum inputan dimasukan dalam tabel dicek terlebih dahulu apakah inputan sudah ada atau belum
-        product = Product.query.filter_by(nama=post_data.get('nama')).first()
+    decorators = [token_required]
 
-        if auth_header:
-            auth_token = auth_header.split(" ")[1]
-        else:
-            auth_token = ''
-        if auth_token and not product:
-            resp = User.decode_auth_token(auth_token)
-            if not isinstance(resp, str):
-            
-                try:
-                    # masukan inputan ke dalam tabel products
-                    product = Product(
-                    nama=post_data.get('nama'),
-                    harga=post_data.get('harga'),
-                    jumlah=post_data.get('jumlah')
-                )
-                    db.session.add(product)
-                    db.session.commit()
-                    responseObject = {
-                        'status': 'success',
-                        'message': 'Successfully insert.'
-                    }
-                    return make_response(jsonify(responseObject)), 200
-                except Exception as e:
-                    responseObject = {
-                        'status': 'fail',
-                        'message': e
-                    }
-                    return make_response(jsonify(responseObject)), 401
+    def post(self):
+        # token sudah valid maka inputan bisa dikirim, inputan divalidasi dulu
+        # karena insert_ignore juga mengabaikan pelanggaran NOT NULL di SQLite
+        row, error = validate_product(request.get_json(silent=True))
+        if error is not None:
+            return invalid_query_response(error)
+        try:
+            # versi dinaikkan dulu (mengunci baris versi sampai commit),
+            # lalu inputan masuk ke tabel products dengan versi tersebut,
+            # nama yang sudah ada ditolak oleh unique index dalam satu query
+            row['version'] = bump_version(Product.__tablename__)
+            inserted = insert_ignore(Product.__table__, ['nama'], row)
+            if inserted:
+                db.session.commit()
             else:
-                responseObject = {
-                    'status': 'fail',
-                    'message': resp
-                }
-                return make_response(jsonify(responseObject)), 401
-        else:
+                db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
             responseObject = {
                 'status': 'fail',
-                'message': 'Provide a valid auth token.'
+                'message': e
             }
-            return make_response(jsonify(responseObject)), 403
-
-    def get(self):
-        # method ini untuk menampilkan data product dan diproteksi dengan token 
-        
-        auth_header = request.headers.get('Authorization')
-        isi = []
-        if auth_header:
-            try:
-                auth_token = auth_header.split(" ")[1]
-            except IndexError:
-                responseObject = {
-                    'status': 'fail',
-                    'message': 'Bearer token malformed.'
-                }
-                return make_response(jsonify(responseObject)), 401
-        else:
-            auth_token = ''
-        if auth_token:
-                resp = User.decode_auth_token(auth_token)
-                if not isinstance(resp, str):
-           
-                    p = Product.query.all()
-                    
-                    for tampil in p:
-                        responseObject = {
-                            'status': 'success',
-                            'data': {
-                                'product_id': tampil.id,
-                                'nama': tampil.nama,
-                                'harga': tampil.harga,
-                                'jumlah': tampil.jumlah,
-                            }
-                        }
-                        isi.append(responseObject)
-                   
-
-                    return make_response(jsonify(isi)), 200
-                   
-                responseObject = {
-                    'status': 'fatal',
-                    'message': resp
-                }
-                isi.append(responseObject)
-            
-                return make_response(jsonify(responseObject)), 401
-                
-
-            
-           
-        else:
+            return make_response(jsonify(responseObject)), 401
+        if not inserted:
             responseObject = {
                 'status': 'fail',
-                'message': 'Provide a valid auth token.'
+                'message': 'Product already exists.'
             }
-           
-            return make_response(jsonify(responseObject)), 401
+            return make_response(jsonify(responseObject)), 202
+        responseObject = {
+            'status': 'success',
+            'message': 'Successfully insert.'
+        }
+        return make_response(jsonify(responseObject)), 200
+
+    def get(self):
+        # method ini untuk menampilkan data product
+        return conditional_list_response(product_listing)
+
 
 class DistributorAPI(MethodView):
     """
     Ini berisi method untuk objek distributor dan diproteksi dengan token maka harus login terlebih dahulu
     """
-    def post(self):
-        # ambil token
-        auth_header = request.headers.get('Authorization')
-        # bila token valid maka bisa mengirim inputan
-        post_data = request.get_json()
-        # ini untuk mengechek apakah inputan sudah ada atau belum dalam database
-        distributor = Distributor.query.filter_by(nama=post_data.get('perusahaan')).first()
+    decorators = [token_required]
 
-        if auth_header:
-            auth_token = auth_header.split(" ")[1]
-        else:
-            auth_token = ''
-        if auth_token and not distributor:
-            resp = User.decode_auth_token(auth_token)
-            if not isinstance(resp, str):
-            
-                try:
-                    # masukan inputan
-                    distributor = Distributor(
-                    nama=post_data.get('perusahaan'),
-                    harga=post_data.get('barang')
-                    
-                    )
-                    db.session.add(distributor)
-                    db.session.commit()
-                    responseObject = {
-                        'status': 'success',
-                        'message': 'Successfully insert.'
-                    }
-                    return make_response(jsonify(responseObject)), 200
-                except Exception as e:
-                    responseObject = {
-                        'status': 'fail',
-                        'message': e
-                    }
-                    return make_response(jsonify(responseObject)), 401
+    def post(self):
+        # token sudah valid maka bisa mengirim inputan, divalidasi dulu
+        row, error = validate_distributor(request.get_json(silent=True))
+        if error is not None:
+            return invalid_query_response(error)
+        try:
+            # versi dinaikkan dulu, lalu inputan masuk dengan versi tersebut,
+            # pasangan perusahaan dan barang yang sudah ada ditolak oleh
+            # unique index dalam satu query
+            row['version'] = bump_version(Distributor.__tablename__)
+            inserted = insert_ignore(
+                Distributor.__table__, ['perusahaan', 'barang'], row)
+            if inserted:
+                db.session.commit()
             else:
-                responseObject = {
-                    'status': 'fail',
-                    'message': resp
-                }
-                return make_response(jsonify(responseObject)), 401
-        else:
+                db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
             responseObject = {
                 'status': 'fail',
-                'message': 'Provide a valid auth token.'
+                'message': e
             }
-            return make_response(jsonify(responseObject)), 403
+            return make_response(jsonify(responseObject)), 401
+        if not inserted:
+            responseObject = {
+                'status': 'fail',
+                'message': 'Distributor already exists.'
+            }
+            return make_response(jsonify(responseObject)), 202
+        responseObject = {
+            'status': 'success',
+            'message': 'Successfully insert.'
+        }
+        return make_response(jsonify(responseObject)), 200
 
     def get(self):
         # method ini untuk menampilkan data distributor
-        auth_header = request.headers.get('Authorization')
-        isi = []
-        if auth_header:
-            try:
-                auth_token = auth_header.split(" ")[1]
-            except IndexError:
-                responseObject = {
-                    'status': 'fail',
-                    'message': 'Bearer token malformed.'
-                }
-                return make_response(jsonify(responseObject)), 401
-        else:
-            auth_token = ''
-        if auth_token:
-                resp = User.decode_auth_token(auth_token)
-                if not isinstance(resp, str):
-                    p = Distributor.query.all()
-                    for tampil in p:
-                        responseObject = {
-                            'status': 'success',
-                            'data': {
-                                'distributor_id': tampil.id,
-                                'perusahaan': tampil.perusahaan,
-                                'barang': tampil.barang,
-                                
-                            }
-                        }
-                        isi.append(responseObject)
-                    
-
-                    return make_response(jsonify(isi)), 200
-                   
-                responseObject = {
-                    'status': 'fatal',
-                    'message': resp
-                }
-                isi.append(responseObject)
-           
-                return make_response(jsonify(responseObject)), 401
-               
+        return conditional_list_response(distributor_listing)
 
-            
-           
-        else:
+
+class BulkAPI(MethodView):
+    """
+    Ini berisi method untuk memasukan banyak product atau distributor
+    sekaligus, diproteksi dengan token
+    """
+    decorators = [token_required]
+
+    def __init__(self, bulk_insert):
+        self.bulk_insert = bulk_insert
+
+    def post(self):
+        try:
+            items = parse_bulk_body(request)
+        except ValueError:
+            return invalid_query_response('Invalid bulk body.')
+        try:
+            results = self.bulk_insert(items)
+        except Exception as e:
+            db.session.rollback()
             responseObject = {
                 'status': 'fail',
-                'message': 'Provide a valid auth token.'
+                'message': 'Some error occurred. Please try again.'
             }
-            
-            return make_response(jsonify(responseObject)), 401
+            return make_response(jsonify(responseObject)), 500
+        responseObject = {
+            'status': 'success',
+            'inserted': sum(1 for r in results if r['status'] == 'inserted'),
+            'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+            'invalid': sum(1 for r in results if r['status'] == 'invalid'),
+            'results': results
+        }
+        return make_response(jsonify(responseObject)), 200
+
+
+class ExportAPI(MethodView):
+    """
+    Ini berisi method untuk export seluruh isi tabel secara streaming,
+    diproteksi dengan token
+    """
+    decorators = [token_required]
+
+    def __init__(self, listing):
+        self.listing = listing
+
+    def get(self):
+        try:
+            fields = self.listing.parse_fields(request.args)
+        except ValueError:
+            return invalid_query_response('Invalid fields parameter.')
+        # format=ndjson untuk satu objek per baris, default JSON array
+        ndjson = request.args.get('format') == 'ndjson'
+        query = self.listing.query(fields).order_by(self.listing.model.id)
+        rows = export_rows(
+            query, self.listing.serializer(fields),
+            app.config.get('CATALOG_EXPORT_BATCH_SIZE'), ndjson
+        )
+        mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+        return Response(stream_with_context(rows), mimetype=mimetype)
+
+
+class ChangesAPI(MethodView):
+    """
+    Ini berisi method untuk mengambil baris yang masuk atau berubah setelah
+    cursor tertentu, diproteksi dengan token
+    """
+    decorators = [token_required]
+
+    def __init__(self, listing):
+        self.listing = listing
+
+    def get(self):
+        try:
+            limit = parse_limit(request.args)
+            since = parse_changes_cursor(request.args.get('since'))
+        except ValueError:
+            return invalid_query_response('Invalid changes parameters.')
+        try:
+            fields = self.listing.parse_fields(request.args)
+        except ValueError:
+            return invalid_query_response('Invalid fields parameter.')
+        rows, cursor, has_more = self.listing.changes(fields, since, limit)
+        serialize = self.listing.changes_serializer(fields)
+        responseObject = {
+            'status': 'success',
+            'data': [serialize(row) for row in rows],
+            # tanpa perubahan baru, cursor lama dipakai lagi
+            'next_cursor': cursor or request.args.get('since'),
+            'has_more': has_more
+        }
+        return make_response(jsonify(responseObject)), 200
 
 
 # mendefinisikan api
 registration_view = RegisterAPI.as_view('register_api')
 login_view = LoginAPI.as_view('login_api')
 user_view = UserAPI.as_view('user_api')
+keys_view = KeysAPI.as_view('keys_api')
+refresh_view = RefreshAPI.as_view('refresh_api')
 logout_view = LogoutAPI.as_view('logout_api')
 product_view = ProductAPI.as_view('product_view')
 distributor_view = DistributorAPI.as_view('distributor_view')
+product_changes_view = ChangesAPI.as_view(
+    'product_changes_view', product_listing)
+distributor_changes_view = ChangesAPI.as_view(
+    'distributor_changes_view', distributor_listing)
+product_bulk_view = BulkAPI.as_view(
+    'product_bulk_view', bulk_insert_products)
+distributor_bulk_view = BulkAPI.as_view(
+    'distributor_bulk_view', bulk_insert_distributors)
+product_export_view = ExportAPI.as_view(
+    'product_export_view', product_listing)
+distributor_export_view = ExportAPI.as_view(
+    'distributor_export_view', distributor_listing)
 # membuat endpoint untuk api
 auth_blueprint.add_url_rule(
     '/auth/register',
@@ -418,6 +549,16 @@ auth_blueprint.add_url_rule(
     view_func=user_view,
     methods=['GET']
 )
+auth_blueprint.add_url_rule(
+    '/auth/refresh',
+    view_func=refresh_view,
+    methods=['POST']
+)
+auth_blueprint.add_url_rule(
+    '/auth/keys',
+    view_func=keys_view,
+    methods=['GET']
+)
 auth_blueprint.add_url_rule(
     '/auth/logout',
     view_func=logout_view,
@@ -442,4 +583,34 @@ auth_blueprint.add_url_rule(
     '/distributor',
     view_func=distributor_view,
     methods=['GET']
-)
\ No newline at end of file
+)
+auth_blueprint.add_url_rule(
+    '/product/export',
+    view_func=product_export_view,
+    methods=['GET']
+)
+auth_blueprint.add_url_rule(
+    '/distributor/export',
+    view_func=distributor_export_view,
+    methods=['GET']
+)
+auth_blueprint.add_url_rule(
+    '/product/bulk',
+    view_func=product_bulk_view,
+    methods=['POST']
+)
+auth_blueprint.add_url_rule(
+    '/distributor/bulk',
+    view_func=distributor_bulk_view,
+    methods=['POST']
+)
+auth_blueprint.add_url_rule(
+    '/product/changes',
+    view_func=product_changes_view,
+    methods=['GET']
+)
+auth_blueprint.add_url_rule(
+    '/distributor/changes',
+    view_func=distributor_changes_view,
+    methods=['GET']
+)
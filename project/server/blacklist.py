@@ -0,0 +1,150 @@
+# project/server/blacklist.py
+
+
+import time
+import logging
+import datetime
+import threading
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from project.server.tokens import token_digest
+
+logger = logging.getLogger(__name__)
+
+
+class BlacklistIndex(object):
+    """
+    Ini untuk menyimpan index token yang diblacklist di memori proses.
+    Index berisi 64 bit pertama dari digest token, jadi jawaban "tidak ada"
+    selalu benar, sedangkan jawaban "mungkin ada" tetap dicek ke database.
+    Worker lain disinkronkan secara berkala dengan mengambil baris baru
+    berdasarkan kolom blacklisted_on. Index dimuat ulang penuh setiap
+    BLACKLIST_REBUILD_INTERVAL (dan setelah prune) supaya digest dari
+    baris yang sudah dihapus ikut hilang.
+    """
+
+    def __init__(self, loader, app=None):
+        # loader(since) mengembalikan list (token digest, blacklisted_on)
+        self.loader = loader
+        self.sync_interval = 0
+        self.sync_overlap = 0
+        self.rebuild_interval = 0
+        self.negatives = 0
+        self.positives = 0
+        self._keys = set()
+        # key yang ditambahkan selama rebuild berjalan
+        self._added = None
+        self._loaded = False
+        self._watermark = None
+        self._next_sync = 0
+        self._next_rebuild = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sync_interval = app.config.get('BLACKLIST_SYNC_INTERVAL', 5)
+        self.sync_overlap = app.config.get('BLACKLIST_SYNC_OVERLAP', 60)
+        self.rebuild_interval = app.config.get('BLACKLIST_REBUILD_INTERVAL', 3600)
+
+    @staticmethod
+    def _key(digest):
+        return int(digest[:16], 16)
+
+    def add(self, auth_token):
+        """ Ini untuk menambahkan token ke index """
+        self.add_digest(token_digest(auth_token))
+
+    def add_digest(self, digest):
+        key = self._key(digest)
+        self._keys.add(key)
+        added = self._added
+        if added is not None:
+            added.append(key)
+
+    def might_contain(self, auth_token):
+        """
+        Ini untuk mengecek apakah token mungkin ada di blacklist
+        :param auth_token:
+        :return: boolean
+        """
+        self.sync()
+        if not self._loaded:
+            # index belum bisa dimuat, jadi semua token harus dicek ke database
+            return True
+        if self._key(token_digest(auth_token)) in self._keys:
+            self.positives += 1
+            return True
+        self.negatives += 1
+        return False
+
+    def sync(self, force=False, rebuild=False):
+        """
+        Ini untuk memuat index pertama kali lalu mengambil delta secara berkala
+        :param rebuild: muat ulang semua baris (misalnya setelah prune)
+        """
+        now = time.time()
+        rebuild = rebuild or not self._loaded or now >= self._next_rebuild
+        if not force and not rebuild and now < self._next_sync:
+            return
+        if not self._lock.acquire(False):
+            # thread lain sedang sinkronisasi
+            return
+        try:
+            since = None
+            if not rebuild and self._watermark is not None:
+                since = self._watermark - datetime.timedelta(
+                    seconds=self.sync_overlap)
+            else:
+                self._added = []
+            try:
+                rows = self.loader(since)
+            except SQLAlchemyError as e:
+                logger.warning('Blacklist index sync failed: %s', e)
+                self._added = None
+                self._next_sync = now + self.sync_interval
+                return
+            if rebuild:
+                keys = set()
+                watermark = None
+            else:
+                keys = self._keys
+                watermark = self._watermark
+            for digest, blacklisted_on in rows:
+                keys.add(self._key(digest))
+                if watermark is None or blacklisted_on > watermark:
+                    watermark = blacklisted_on
+            if rebuild:
+                # logout di worker ini selama rebuild tidak boleh hilang
+                keys.update(self._added)
+                self._keys = keys
+                self._added = None
+                self._next_rebuild = now + self.rebuild_interval
+            self._watermark = watermark
+            self._loaded = True
+            self._next_sync = now + self.sync_interval
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._loaded = False
+            self._watermark = None
+            self._next_sync = 0
+            self._next_rebuild = 0
+            self.negatives = 0
+            self.positives = 0
+
+    def stats(self):
+        """
+        Ini untuk menampilkan statistik index
+        :return: dict
+        """
+        return {
+            'size': len(self._keys),
+            'loaded': self._loaded,
+            'negatives': self.negatives,
+            'positives': self.positives,
+        }
@@ -0,0 +1,183 @@
+# project/server/cache.py
+
+
+import threading
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LRUBackend(object):
+    """
+    Ini untuk menyimpan cache di memori proses dengan batas jumlah entry (LRU)
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def incr_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            # entry lama untuk namespace ini tidak akan pernah dibaca lagi
+            stale = [key for key in self._entries if key[0] == namespace]
+            for key in stale:
+                del self._entries[key]
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend(object):
+    """
+    Ini untuk menyimpan cache di redis (atau client lain dengan method
+    get, set dan incr yang sama), sehingga bisa dipakai bersama oleh semua
+    worker gunicorn
+    """
+
+    def __init__(self, client, ttl, prefix='response-cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        # eviction di redis diatur oleh redis sendiri
+        self.evictions = 0
+
+    def _key(self, key):
+        return self.prefix + ':'.join(str(part) for part in key)
+
+    def generation(self, namespace):
+        return int(self.client.get(self.prefix + namespace + ':gen') or 0)
+
+    def incr_generation(self, namespace):
+        self.client.incr(self.prefix + namespace + ':gen')
+
+    def get(self, key):
+        return self.client.get(self._key(key))
+
+    def set(self, key, value):
+        self.client.set(self._key(key), value, ex=self.ttl)
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class ResponseCache(object):
+    """
+    Ini untuk menyimpan body response yang sudah diserialisasi per namespace
+    (nama tabel). Invalidasi dilakukan dengan menaikkan generasi namespace.
+    """
+
+    def __init__(self, app=None):
+        self.backend = LRUBackend(0)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'lru')
+        if backend == 'redis':
+            if redis is None:
+                raise RuntimeError(
+                    'RESPONSE_CACHE_BACKEND redis requires the redis package')
+            client = redis.StrictRedis.from_url(
+                app.config.get('RESPONSE_CACHE_REDIS_URL'))
+            self.backend = RedisBackend(
+                client, app.config.get('RESPONSE_CACHE_TTL'))
+        else:
+            self.backend = LRUBackend(app.config.get('RESPONSE_CACHE_SIZE', 0))
+
+    def get(self, namespace, key):
+        """
+        Ini untuk mengambil entry cache
+        :return: bytes|None
+        """
+        value = self.backend.get(
+            (namespace, self.backend.generation(namespace), key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, namespace, key, value):
+        self.backend.set(
+            (namespace, self.backend.generation(namespace), key), value)
+
+    def invalidate(self, namespace):
+        """ Ini untuk membuang semua entry dari satu namespace """
+        self.invalidations += 1
+        self.backend.incr_generation(namespace)
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def stats(self):
+        """
+        Ini untuk menampilkan statistik cache
+        :return: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self.backend),
+        }
+
+
+def pack_response(mimetype, next_cursor, body):
+    """
+    Ini untuk menggabungkan mimetype, cursor dan body menjadi satu bytes
+    :return: bytes
+    """
+    header = '{}\n{}\n'.format(mimetype, next_cursor or '')
+    return header.encode('utf-8') + body
+
+
+def unpack_response(value):
+    """
+    Ini untuk memecah entry cache menjadi mimetype, cursor dan body
+    :return: tuple
+    """
+    mimetype, next_cursor, body = value.split(b'\n', 2)
+    return mimetype.decode('utf-8'), next_cursor.decode('utf-8') or None, body
@@ -0,0 +1,239 @@
+# project/server/catalog.py
+
+
+from sqlalchemy import or_
+
+from project.server import app, db, json_provider
+from project.server.models import Product, Distributor, CatalogVersion
+
+
+def parse_limit(args):
+    """
+    Ini untuk membaca parameter limit, dibatasi oleh CATALOG_MAX_PAGE_SIZE
+    :return: integer
+    :raise ValueError: bila parameter tidak valid
+    """
+    limit = int(args.get('limit', app.config.get('CATALOG_PAGE_SIZE')))
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, app.config.get('CATALOG_MAX_PAGE_SIZE'))
+
+
+def parse_page_args(args):
+    """
+    Ini untuk membaca parameter limit dan after_id dari query string.
+    Ukuran halaman dibatasi oleh CATALOG_MAX_PAGE_SIZE.
+    :param args: request.args
+    :return: tuple (limit, after_id)
+    :raise ValueError: bila parameter tidak valid
+    """
+    limit = parse_limit(args)
+    after_id = args.get('after_id')
+    if after_id is not None:
+        after_id = int(after_id)
+        if after_id < 0:
+            raise ValueError('after_id must not be negative')
+    return limit, after_id
+
+
+def keyset_page(query, column, after_id, limit):
+    """
+    Ini untuk mengambil satu halaman data memakai
+    WHERE id > :after ORDER BY id LIMIT n, sehingga halaman yang jauh
+    sama murahnya dengan halaman pertama.
+    Kolom pertama dari setiap baris harus berupa id.
+    :return: tuple (rows, next_cursor)
+    """
+    if after_id is not None:
+        query = query.filter(column > after_id)
+    # ambil satu baris lebih untuk mengetahui apakah masih ada halaman berikutnya
+    rows = query.order_by(column).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1][0])
+    return rows, next_cursor
+
+
+def parse_changes_cursor(since):
+    """
+    Ini untuk membaca cursor perubahan berformat <version>.<id>
+    :return: tuple (version, id)|None
+    :raise ValueError: bila cursor tidak valid
+    """
+    if not since:
+        return None
+    version, separator, row_id = since.partition('.')
+    if not separator:
+        # termasuk cursor lama berbasis waktu (<updated_at>-<id>)
+        raise ValueError('invalid cursor')
+    version, row_id = int(version), int(row_id)
+    if version < 0 or row_id < 0:
+        raise ValueError('invalid cursor')
+    return version, row_id
+
+
+def changes_cursor(version, row_id):
+    """ Ini untuk membuat cursor perubahan dari baris terakhir """
+    return '{}.{}'.format(version, row_id)
+
+
+def current_version(name):
+    """
+    Ini untuk mengambil versi tabel katalog (satu lookup primary key)
+    :param name: nama tabel
+    :return: tuple (version, updated_at)
+    """
+    row = db.session.query(
+        CatalogVersion.version, CatalogVersion.updated_at
+    ).filter(CatalogVersion.name == name).first()
+    if row is None:
+        return 0, None
+    return row[0], row[1]
+
+
+class Listing(object):
+    """
+    Ini untuk mendeskripsikan kolom yang bisa dibaca dari satu tabel.
+    Query hanya memilih kolom yang diminta dan menghasilkan tuple biasa,
+    tanpa membuat objek ORM dan tanpa masuk ke identity map session.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        # list (nama field di response, kolom)
+        self.fields = fields
+        self.columns = dict(fields)
+        self.names = [name for name, column in fields]
+
+    def parse_fields(self, args):
+        """
+        Ini untuk membaca parameter fields=a,b dari query string
+        :return: list nama field
+        :raise ValueError: bila ada field yang tidak dikenal
+        """
+        fields = args.get('fields')
+        if not fields:
+            return self.names
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        if not names or any(name not in self.columns for name in names):
+            raise ValueError('unknown field')
+        # urutan response tetap mengikuti urutan definisi field
+        return [name for name in self.names if name in names]
+
+    def query(self, names):
+        """
+        Ini untuk membuat query kolom, id selalu menjadi kolom pertama
+        :return: query yang menghasilkan tuple
+        """
+        columns = [self.columns[name] for name in names]
+        return db.session.query(self.model.id, *columns)
+
+    def changes(self, names, since, limit):
+        """
+        Ini untuk mengambil baris yang masuk atau berubah setelah cursor,
+        berurutan berdasarkan (version, id) memakai index yang sama.
+        Versi baris diberikan sesuai urutan commit (lihat bump_version),
+        sehingga transaksi yang commit belakangan selalu mendapat versi
+        di atas cursor yang sudah dibagikan dan tidak terlewat.
+        :param since: tuple (version, id)|None
+        :return: tuple (rows, cursor terakhir|None, masih ada data)
+        """
+        model = self.model
+        columns = [self.columns[name] for name in names]
+        query = db.session.query(
+            model.id, *(columns + [model.version, model.updated_at]))
+        if since is not None:
+            version, row_id = since
+            query = query.filter(
+                model.version >= version,
+                or_(model.version > version, model.id > row_id)
+            )
+        rows = query.order_by(model.version, model.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = changes_cursor(rows[-1][-2], rows[-1][0]) if rows else None
+        return rows, cursor, has_more
+
+    def changes_serializer(self, names):
+        """
+        Ini untuk membuat fungsi yang mengubah satu baris perubahan menjadi dict
+        :return: function
+        """
+        def serialize(row):
+            data = dict(zip(names, row[1:-2]))
+            data['updated_at'] = row[-1].isoformat()
+            return data
+        return serialize
+
+    def columnar(self, names, rows):
+        """
+        Ini untuk menyusun satu halaman menjadi array per kolom
+        dengan satu status untuk seluruh response
+        :return: dict
+        """
+        columns = list(zip(*rows))[1:] if rows else [()] * len(names)
+        return {
+            'status': 'success',
+            'fields': names,
+            'data': dict((name, list(column))
+                         for name, column in zip(names, columns))
+        }
+
+    def serializer(self, names):
+        """
+        Ini untuk membuat fungsi yang mengubah satu tuple menjadi objek response
+        :return: function
+        """
+        def serialize(row):
+            return {
+                'status': 'success',
+                'data': dict(zip(names, row[1:]))
+            }
+        return serialize
+
+
+product_listing = Listing(Product, [
+    ('product_id', Product.id),
+    ('nama', Product.nama),
+    ('harga', Product.harga),
+    ('jumlah', Product.jumlah),
+])
+
+distributor_listing = Listing(Distributor, [
+    ('distributor_id', Distributor.id),
+    ('perusahaan', Distributor.perusahaan),
+    ('barang', Distributor.barang),
+])
+
+
+def export_rows(query, serialize, batch_size, ndjson=False):
+    """
+    Ini untuk menghasilkan isi export secara bertahap (generator).
+    Data dibaca dari server-side cursor per batch lalu langsung
+    diserialisasi, sehingga memori tetap datar berapapun jumlah barisnya.
+    :param query: query yang sudah diurutkan
+    :param serialize: fungsi untuk mengubah satu baris menjadi dict
+    :param batch_size: jumlah baris per batch
+    :param ndjson: True untuk NDJSON, False untuk JSON array
+    """
+    rows = query.execution_options(stream_results=True).yield_per(batch_size)
+    chunk = []
+    if not ndjson:
+        chunk.append(b'[')
+    separator = b'\n' if ndjson else b','
+    count = 0
+    for row in rows:
+        if count and not ndjson:
+            chunk.append(separator)
+        chunk.append(json_provider.dumps(serialize(row)))
+        if ndjson:
+            chunk.append(separator)
+        count += 1
+        if count % batch_size == 0:
+            yield b''.join(chunk)
+            chunk = []
+    if not ndjson:
+        chunk.append(b']')
+    if chunk:
+        yield b''.join(chunk)
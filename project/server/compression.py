@@ -0,0 +1,140 @@
+# project/server/compression.py
+
+
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+class GzipStream(object):
+    """
+    Ini untuk kompresi gzip bertahap, setiap chunk langsung di-flush
+    supaya client bisa membaca response streaming tanpa menunggu akhir
+    """
+
+    def __init__(self, level):
+        # wbits 31 = format gzip (header dan checksum)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + \
+            self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliStream(object):
+    """ Ini untuk kompresi brotli bertahap """
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compress_stream(iterable, charset, stream):
+    """
+    Ini untuk mengompres response generator chunk per chunk
+    :param iterable: isi response asli
+    :param stream: GzipStream|BrotliStream
+    """
+    try:
+        for chunk in iterable:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode(charset)
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        # generator asli (misalnya stream_with_context) tetap ditutup
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+class Compress(object):
+    """
+    Ini untuk mengompres response (gzip, atau brotli bila terpasang)
+    sesuai header Accept-Encoding, untuk semua route aplikasi
+    """
+
+    def __init__(self, app=None):
+        self.min_size = 500
+        self.mimetypes = set()
+        self.levels = {}
+        self.stream_enabled = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ()))
+        self.levels = {
+            'gzip': app.config.get('COMPRESS_GZIP_LEVEL', 6),
+            'br': app.config.get('COMPRESS_BROTLI_LEVEL', 4),
+        }
+        self.stream_enabled = app.config.get('COMPRESS_STREAMS', True)
+        app.after_request(self.after_request)
+
+    def encodings(self):
+        """
+        Ini untuk daftar encoding yang didukung, brotli lebih diutamakan
+        :return: list encoding
+        """
+        if brotli is not None:
+            return ['br', 'gzip']
+        return ['gzip']
+
+    def compress(self, encoding, data):
+        """
+        Ini untuk mengompres body yang sudah lengkap
+        :return: bytes
+        """
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.levels['br'])
+        stream = GzipStream(self.levels['gzip'])
+        return stream.compress(data) + stream.finish()
+
+    def after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 304) or
+                'Content-Encoding' in response.headers or
+                response.mimetype not in self.mimetypes):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            if not self.stream_enabled:
+                return response
+            # panjang body streaming tidak diketahui, jadi selalu dikompres
+            stream = BrotliStream(self.levels['br']) if encoding == 'br' \
+                else GzipStream(self.levels['gzip'])
+            response.response = compress_stream(
+                response.response, response.charset, stream)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self.compress(encoding, data))
+        response.headers['Content-Encoding'] = encoding
+        # ETag kuat harus berbeda untuk setiap representasi
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag('{}-{}'.format(etag, encoding))
+        return response
@@ -12,12 +12,111 @@ class BaseConfig:
     DEBUG = False
     BCRYPT_LOG_ROUNDS = 13
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # pool koneksi database per worker
+    SQLALCHEMY_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 5))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 10))
+    SQLALCHEMY_POOL_TIMEOUT = 10
+    # koneksi yang lebih tua dari ini (detik) dibuka ulang
+    SQLALCHEMY_POOL_RECYCLE = 1800
+    # SELECT 1 sebelum koneksi dari pool dipakai
+    SQLALCHEMY_POOL_PRE_PING = True
+    # jumlah koneksi yang dibuka saat worker gunicorn start
+    SQLALCHEMY_POOL_WARMUP = 0
+    # replica untuk query baca pada request GET/HEAD, dipisah koma di env
+    SQLALCHEMY_REPLICA_URIS = [
+        uri for uri in os.getenv('DATABASE_REPLICA_URIS', '').split(',') if uri
+    ]
+    # round_robin atau least_loaded (koneksi aktif paling sedikit)
+    SQLALCHEMY_REPLICA_SELECTION = os.getenv('DATABASE_REPLICA_SELECTION', 'round_robin')
+    # cache token yang sudah diverifikasi, per proses worker
+    # TTL membatasi berapa lama worker lain masih menerima token yang sudah logout
+    TOKEN_CACHE_SIZE = 10000
+    TOKEN_CACHE_TTL = 30
+    # simpan email, admin dan registered_on di token supaya /auth/status
+    # tidak perlu membaca tabel users; naikkan versi bila isi claims berubah
+    JWT_USER_CLAIMS = False
+    JWT_CLAIMS_VERSION = 1
+    # key ring JWT: list dict {'kid', 'algorithm', 'secret'} untuk HMAC atau
+    # {'kid', 'algorithm', 'private_key'/'public_key'} (PEM) untuk RS*/ES*.
+    # Kosong berarti SECRET_KEY dengan HS256 (kid 'default'). Untuk rotasi,
+    # tambahkan kunci baru lalu ganti JWT_SIGNING_KID; kunci lama tetap
+    # dipakai untuk verifikasi sampai tokennya expired.
+    JWT_KEYS = []
+    JWT_KEYS_FILE = os.getenv('JWT_KEYS_FILE')
+    JWT_SIGNING_KID = os.getenv('JWT_SIGNING_KID')
+    # kid untuk token lama yang belum punya header kid
+    JWT_LEGACY_KID = 'default'
+    # umur refresh token (detik)
+    REFRESH_TOKEN_TTL = 14 * 24 * 3600
+    # index blacklist di memori, disinkronkan antar worker tiap beberapa detik
+    BLACKLIST_SYNC_INTERVAL = 5
+    BLACKLIST_SYNC_OVERLAP = 60
+    # index dimuat ulang penuh supaya digest token yang sudah di-prune hilang
+    BLACKLIST_REBUILD_INTERVAL = 3600
+    # token expired baru dihapus setelah lewat masa toleransi (detik)
+    BLACKLIST_PRUNE_GRACE = 60
+    # hashing bcrypt dijalankan di pool: 'thread', 'process' atau 'inline'
+    PASSWORD_HASH_EXECUTOR = 'thread'
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_QUEUE_SIZE = 8
+    PASSWORD_HASH_TIMEOUT = 10
+    # ukuran halaman untuk /product/list dan /distributor
+    CATALOG_PAGE_SIZE = 100
+    CATALOG_MAX_PAGE_SIZE = 1000
+    # jumlah baris per batch saat export streaming
+    CATALOG_EXPORT_BATCH_SIZE = 500
+    # jumlah item maksimal per request bulk insert
+    CATALOG_BULK_MAX_ITEMS = 50000
+    # cache body response list: 'lru' (per proses) atau 'redis' (bersama)
+    RESPONSE_CACHE_BACKEND = 'lru'
+    RESPONSE_CACHE_SIZE = 256
+    RESPONSE_CACHE_REDIS_URL = os.getenv('RESPONSE_CACHE_REDIS_URL')
+    RESPONSE_CACHE_TTL = 300
+    # backend JSON: auto (orjson bila terpasang), orjson atau json
+    JSON_BACKEND = 'auto'
+    # format datetime di response: http (format lama flask) atau iso
+    JSON_DATETIME_FORMAT = 'http'
+    # response list besar tidak perlu diindentasi
+    JSONIFY_PRETTYPRINT_REGULAR = False
+    # kompresi response: hanya body >= COMPRESS_MIN_SIZE byte, streaming selalu
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_LEVEL = 4
+    COMPRESS_STREAMS = True
+    COMPRESS_MIMETYPES = [
+        'application/json',
+        'application/vnd.catalog.columnar+json',
+        'application/x-ndjson',
+        'application/x-msgpack',
+        'text/html',
+        'text/plain',
+    ]
+    # waktu per fase request (auth, db, hash, serialize) dan jumlah query,
+    # dikirim di header Server-Timing, dicatat di log dan histogram per endpoint
+    REQUEST_TIMING = True
+    REQUEST_TIMING_HEADER = True
+    # batas bucket histogram durasi request dan fase (milidetik), juga dipakai /metrics
+    REQUEST_TIMING_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+    # folder file metric per worker gunicorn, /metrics menjumlahkan semuanya
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    # jeda minimal (detik) antar penulisan file metric oleh satu worker
+    METRICS_FLUSH_INTERVAL = 1.0
+    # query lebih lama dari ini (detik) dicatat di log, None untuk mematikan
+    SLOW_QUERY_THRESHOLD = 0.5
+    # sertakan hasil EXPLAIN di log query lambat (query dijalankan dua kali)
+    SLOW_QUERY_EXPLAIN = False
+    # SQL yang sama sebanyak ini dalam satu request ditandai kemungkinan N+1
+    N_PLUS_ONE_THRESHOLD = 10
+    # batas jumlah query per request, None untuk tanpa batas
+    QUERY_BUDGET = None
 
 
 class DevelopmentConfig(BaseConfig):
     """Konfigurasi untuk mode development"""
     DEBUG = True
     BCRYPT_LOG_ROUNDS = 4
+    SLOW_QUERY_THRESHOLD = 0.1
+    SLOW_QUERY_EXPLAIN = True
     SQLALCHEMY_DATABASE_URI = postgres_local_base + database_name
 
 
@@ -26,6 +125,8 @@ class TestingConfig(BaseConfig):
     DEBUG = True
     TESTING = True
     BCRYPT_LOG_ROUNDS = 4
+    N_PLUS_ONE_THRESHOLD = 5
+    QUERY_BUDGET = 15
     SQLALCHEMY_DATABASE_URI = postgres_local_base + database_name 
     PRESERVE_CONTEXT_ON_EXCEPTION = False
 
@@ -34,4 +135,7 @@ class ProductionConfig(BaseConfig):
     """Konfigurasi untuk mode produksi."""
     SECRET_KEY = 'my_precious'
     DEBUG = False
+    SQLALCHEMY_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 10))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 20))
+    SQLALCHEMY_POOL_WARMUP = int(os.getenv('DATABASE_POOL_WARMUP', 2))
     SQLALCHEMY_DATABASE_URI = postgres_local_base + database_name
@@ -0,0 +1,166 @@
+# project/server/encoding.py
+
+
+import datetime
+import json
+
+from flask import current_app, request
+from flask.json import JSONEncoder as FlaskJSONEncoder
+from werkzeug.http import http_date
+
+from project.server.timing import phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# format response list yang bisa diminta lewat header Accept
+JSON_MIMETYPE = 'application/json'
+COLUMNAR_MIMETYPE = 'application/vnd.catalog.columnar+json'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+
+class JSONEncoder(FlaskJSONEncoder):
+    """
+    Ini untuk encoder stdlib yang juga bisa menserialisasi exception
+    (pesan error yang dimasukan ke response) dan datetime
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.datetime_format = kwargs.pop('datetime_format', 'http')
+        super(JSONEncoder, self).__init__(*args, **kwargs)
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return format_datetime(o, self.datetime_format)
+        if isinstance(o, BaseException):
+            return str(o)
+        return super(JSONEncoder, self).default(o)
+
+
+def format_datetime(value, datetime_format):
+    """
+    Ini untuk mengubah datetime menjadi string sesuai JSON_DATETIME_FORMAT
+    :param datetime_format: 'http' (format lama flask) atau 'iso'
+    :return: string
+    """
+    if datetime_format == 'iso':
+        return value.isoformat()
+    return http_date(value.utctimetuple())
+
+
+def list_mimetypes():
+    """
+    Ini untuk daftar format response list, JSON tetap menjadi default
+    dan MessagePack hanya ditawarkan bila paket msgpack terpasang
+    :return: list mimetype
+    """
+    mimetypes = [JSON_MIMETYPE, COLUMNAR_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    return mimetypes
+
+
+def negotiate(accept):
+    """
+    Ini untuk memilih format response dari header Accept
+    :param accept: request.accept_mimetypes
+    :return: mimetype
+    """
+    return accept.best_match(list_mimetypes(), default=JSON_MIMETYPE)
+
+
+def packb(obj):
+    """
+    Ini untuk menserialisasi objek menjadi MessagePack
+    :return: bytes
+    """
+    return msgpack.packb(obj, use_bin_type=True, default=_orjson_default)
+
+
+def _orjson_default(o):
+    if isinstance(o, BaseException):
+        return str(o)
+    if isinstance(o, datetime.datetime):
+        return format_datetime(o, 'http')
+    raise TypeError('Object of type {} is not JSON serializable'.format(
+        type(o).__name__))
+
+
+class JSONProvider(object):
+    """
+    Ini untuk memilih backend serialisasi JSON: orjson bila terpasang,
+    bila tidak memakai json dari stdlib
+    """
+
+    def __init__(self, app=None):
+        self.backend = 'json'
+        self.sort_keys = True
+        self.indent = False
+        self.datetime_format = 'http'
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND orjson requires the orjson package')
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'json'
+        self.backend = backend
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', True)
+        self.indent = app.config.get('JSONIFY_PRETTYPRINT_REGULAR', False)
+        self.datetime_format = app.config.get('JSON_DATETIME_FORMAT', 'http')
+        app.json_encoder = JSONEncoder
+        app.extensions['json_provider'] = self
+
+    def dumps(self, obj, indent=False):
+        """
+        Ini untuk menserialisasi objek menjadi JSON
+        :return: bytes
+        """
+        if self.backend == 'orjson':
+            option = 0
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if self.datetime_format != 'iso':
+                # datetime diserahkan ke default supaya formatnya sama dengan stdlib
+                option |= orjson.OPT_PASSTHROUGH_DATETIME
+            return orjson.dumps(obj, default=_orjson_default, option=option)
+        return json.dumps(
+            obj, cls=JSONEncoder, datetime_format=self.datetime_format,
+            sort_keys=self.sort_keys, indent=2 if indent else None,
+            separators=(',', ': ') if indent else (',', ':')
+        ).encode('utf-8')
+
+    def response(self, obj):
+        """
+        Ini untuk membuat response application/json seperti flask.jsonify
+        :return: response
+        """
+        indent = self.indent and not request.is_xhr
+        with phase('serialize'):
+            body = self.dumps(obj, indent=indent) + b'\n'
+        return current_app.response_class(body, mimetype='application/json')
+
+
+def jsonify(*args, **kwargs):
+    """
+    Ini pengganti flask.jsonify yang memakai backend JSON dari aplikasi
+    :return: response
+    """
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+    if len(args) == 1:
+        data = args[0]
+    else:
+        data = args or kwargs
+    return current_app.extensions['json_provider'].response(data)
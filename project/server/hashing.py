@@ -0,0 +1,114 @@
+# project/server/hashing.py
+
+
+import threading
+from concurrent.futures import (
+    ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
+)
+
+import flask_bcrypt
+
+from project.server.timing import phase
+
+
+class HashingBusy(Exception):
+    """ Ini dilempar bila antrian hashing password sudah penuh """
+
+
+def _generate_password_hash(password, rounds):
+    return flask_bcrypt.generate_password_hash(password, rounds).decode()
+
+
+def _check_password_hash(pw_hash, password):
+    return flask_bcrypt.check_password_hash(pw_hash, password)
+
+
+class PasswordHasher(object):
+    """
+    Ini untuk menjalankan hashing dan verifikasi password bcrypt di pool
+    terpisah dengan batas antrian, sehingga lonjakan login tidak menahan
+    worker yang melayani endpoint lain.
+    """
+
+    def __init__(self, app=None):
+        self.executor_type = 'inline'
+        self.rounds = 12
+        self.max_workers = 1
+        self.max_pending = 0
+        self.timeout = None
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # jumlah round bcrypt untuk hash baru, dikirim ke fungsi di pool
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        # 'thread', 'process' atau 'inline' (tanpa pool)
+        self.executor_type = app.config.get('PASSWORD_HASH_EXECUTOR', 'thread')
+        self.max_workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.max_pending = self.max_workers + app.config.get(
+            'PASSWORD_HASH_QUEUE_SIZE', 8)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+
+    def _get_executor(self):
+        # pool dibuat saat pertama dipakai, yaitu setelah gunicorn fork
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+        return self._executor
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingBusy('Password hashing queue is full.')
+            self._pending += 1
+            if self.executor_type != 'inline':
+                executor = self._get_executor()
+        if self.executor_type == 'inline':
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # slot baru dilepas setelah pekerjaan benar-benar selesai
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            raise HashingBusy('Password hashing timed out.')
+
+    def generate(self, password, rounds=None):
+        """
+        Ini untuk menghasilkan hash password
+        :param rounds: default BCRYPT_LOG_ROUNDS
+        :return: string
+        """
+        with phase('hash'):
+            return self._run(_generate_password_hash, password,
+                             rounds or self.rounds)
+
+    def check(self, pw_hash, password):
+        """
+        Ini untuk memverifikasi password
+        :return: boolean
+        """
+        with phase('hash'):
+            return self._run(_check_password_hash, pw_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,278 @@
+# project/server/ingest.py
+
+
+import datetime
+import re
+
+from flask import json
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from project.server import app, db, response_cache
+from project.server.models import Product, Distributor, CatalogVersion
+
+# batas jumlah parameter per query IN (SQLite hanya mengizinkan 999)
+IN_CHUNK_SIZE = 500
+# jumlah baris per statement INSERT ... VALUES multi-row
+INSERT_CHUNK_SIZE = 1000
+# string angka bulat yang diterima untuk kolom integer
+INT_STRING = re.compile(r'^\s*-?[0-9]+\s*$')
+
+
+def parse_bulk_body(req):
+    """
+    Ini untuk membaca body bulk berupa JSON array atau NDJSON
+    (Content-Type: application/x-ndjson)
+    :param req: request
+    :return: list item
+    :raise ValueError: bila body tidak valid atau terlalu besar
+    """
+    if req.mimetype == 'application/x-ndjson':
+        items = [
+            json.loads(line) for line in req.get_data(as_text=True).splitlines()
+            if line.strip()
+        ]
+    else:
+        items = req.get_json(silent=True)
+        if not isinstance(items, list):
+            raise ValueError('body must be a JSON array')
+    if len(items) > app.config.get('CATALOG_BULK_MAX_ITEMS'):
+        raise ValueError('too many items')
+    return items
+
+
+def _to_int(value):
+    """
+    Ini untuk membaca angka bulat, string angka ("1000") juga diterima
+    karena sebelumnya PostgreSQL juga mengubahnya menjadi integer saat insert
+    :return: integer|None
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and INT_STRING.match(value):
+        return int(value)
+    return None
+
+
+def _is_text(value):
+    return isinstance(value, str) and bool(value.strip()) and len(value) <= 255
+
+
+def validate_product(item):
+    """
+    Ini untuk memvalidasi satu item product
+    :return: tuple (row, pesan error)
+    """
+    if not isinstance(item, dict):
+        return None, 'Item must be an object.'
+    nama = item.get('nama')
+    if not _is_text(nama):
+        return None, 'Invalid nama.'
+    row = {'nama': nama}
+    for key in ('harga', 'jumlah'):
+        value = _to_int(item.get(key))
+        if value is None or value < 0:
+            return None, 'Invalid {}.'.format(key)
+        row[key] = value
+    return row, None
+
+
+def validate_distributor(item):
+    """
+    Ini untuk memvalidasi satu item distributor
+    :return: tuple (row, pesan error)
+    """
+    if not isinstance(item, dict):
+        return None, 'Item must be an object.'
+    for key in ('perusahaan', 'barang'):
+        if not _is_text(item.get(key)):
+            return None, 'Invalid {}.'.format(key)
+    return {
+        'perusahaan': item['perusahaan'],
+        'barang': item['barang'],
+    }, None
+
+
+def insert_ignore(table, conflict_columns, rows):
+    """
+    Ini untuk insert yang mengabaikan baris yang melanggar unique index:
+    INSERT ... ON CONFLICT DO NOTHING di PostgreSQL dan INSERT OR IGNORE
+    di SQLite.
+    :param table: tabel
+    :param conflict_columns: kolom unique index
+    :param rows: dict untuk satu baris atau list dict untuk executemany
+    :return: integer jumlah baris yang masuk
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table).on_conflict_do_nothing(
+            index_elements=conflict_columns)
+    elif dialect == 'sqlite':
+        stmt = table.insert().prefix_with('OR IGNORE')
+    else:
+        stmt = table.insert()
+    return db.session.execute(stmt, rows).rowcount
+
+
+def bump_version(name):
+    """
+    Ini untuk menaikkan versi tabel katalog di dalam transaksi yang sedang
+    berjalan, sehingga versi baru terlihat bersamaan dengan datanya.
+    UPDATE mengunci baris versi sampai commit, jadi penulis berikutnya
+    mendapat versi yang lebih besar dan urutan versi sama dengan urutan
+    commit. Panggil sebelum menulis baris, lalu isi kolom version baris
+    tersebut dengan hasilnya.
+    :param name: nama tabel
+    :return: integer versi baru
+    """
+    # cache response tabel ini dibuang setelah transaksi commit
+    db.session().info.setdefault('bumped_versions', set()).add(name)
+    table = CatalogVersion.__table__
+    now = datetime.datetime.utcnow()
+    update = table.update().where(table.c.name == name).values(
+        version=table.c.version + 1, updated_at=now)
+    if not db.session.execute(update).rowcount and \
+            not insert_ignore(table, ['name'],
+                              {'name': name, 'version': 1, 'updated_at': now}):
+        # baris versi baru saja dibuat oleh transaksi lain
+        db.session.execute(update)
+    return db.session.execute(
+        db.select([table.c.version]).where(table.c.name == name)).scalar()
+
+
+@event.listens_for(SignallingSession, 'before_flush')
+def bump_versions_on_flush(session, flush_context, instances):
+    # perubahan lewat ORM (add/update/delete) juga menaikkan versi tabel,
+    # baris yang ditulis diberi versi baru tersebut
+    names = set()
+    written = []
+    for obj in session.deleted:
+        if isinstance(obj, (Product, Distributor)):
+            names.add(obj.__tablename__)
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, (Product, Distributor)) and \
+                (obj in session.new or session.is_modified(obj)):
+            names.add(obj.__tablename__)
+            written.append(obj)
+    versions = dict((name, bump_version(name)) for name in sorted(names))
+    for obj in written:
+        obj.version = versions[obj.__tablename__]
+
+
+@event.listens_for(SignallingSession, 'after_commit')
+def invalidate_responses_on_commit(session):
+    for name in session.info.pop('bumped_versions', ()):
+        response_cache.invalidate(name)
+
+
+@event.listens_for(SignallingSession, 'after_rollback')
+def forget_versions_on_rollback(session):
+    session.info.pop('bumped_versions', None)
+
+
+def insert_returning(table, conflict_columns, rows):
+    """
+    Ini untuk insert multi-row di PostgreSQL yang mengembalikan key
+    dari baris yang benar-benar masuk
+    :return: set tuple key
+    """
+    key = [table.c[name] for name in conflict_columns]
+    inserted = set()
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        stmt = postgresql.insert(table).values(
+            rows[start:start + INSERT_CHUNK_SIZE]
+        ).on_conflict_do_nothing(
+            index_elements=conflict_columns
+        ).returning(*key)
+        inserted.update(tuple(row) for row in db.session.execute(stmt))
+    return inserted
+
+
+def existing_keys(table, key_columns, keys):
+    """
+    Ini untuk mengambil key yang sudah ada di database dengan query IN
+    pada kolom pertama dari key
+    :return: set tuple key
+    """
+    columns = [table.c[name] for name in key_columns]
+    values = list(set(key[0] for key in keys))
+    found = set()
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        query = db.select(columns).where(
+            columns[0].in_(values[start:start + IN_CHUNK_SIZE]))
+        found.update(tuple(row) for row in db.session.execute(query))
+    return found & set(keys)
+
+
+def bulk_insert(table, key_columns, validate, items, duplicate_message):
+    """
+    Ini untuk memasukan banyak baris dalam satu transaksi. Baris dengan key
+    yang sudah ada (di database atau di item sebelumnya) dilewati.
+    :param table: tabel tujuan
+    :param key_columns: kolom unique index
+    :param validate: fungsi validasi satu item
+    :param items: list item dari body request
+    :param duplicate_message: pesan untuk item yang dilewati
+    :return: list hasil per item
+    """
+    results = []
+    rows = []
+    seen = set()
+    for index, item in enumerate(items):
+        row, error = validate(item)
+        if error:
+            results.append(({'index': index, 'status': 'invalid',
+                             'message': error}, None))
+            continue
+        key = tuple(row[name] for name in key_columns)
+        result = {'index': index, 'status': 'skipped',
+                  'message': duplicate_message}
+        result.update((name, row[name]) for name in key_columns)
+        results.append((result, key))
+        if key not in seen:
+            seen.add(key)
+            rows.append(row)
+
+    if rows:
+        # versi dinaikkan sebelum insert supaya semua baris mendapat versi
+        # yang urutannya sama dengan urutan commit transaksi ini
+        version = bump_version(table.name)
+        for row in rows:
+            row['version'] = version
+    if rows and db.engine.dialect.name == 'postgresql':
+        # duplikat ditangani unique index, tanpa SELECT terlebih dahulu
+        inserted = insert_returning(table, key_columns, rows)
+    else:
+        existing = existing_keys(table, key_columns, seen)
+        rows = [
+            row for row in rows
+            if tuple(row[name] for name in key_columns) not in existing
+        ]
+        if rows:
+            insert_ignore(table, key_columns, rows)
+        inserted = set(tuple(row[name] for name in key_columns) for row in rows)
+    if inserted:
+        db.session.commit()
+    else:
+        # tidak ada baris baru, kenaikan versi dibatalkan
+        db.session.rollback()
+
+    for result, key in results:
+        if key in inserted:
+            inserted.discard(key)
+            result['status'] = 'inserted'
+            del result['message']
+    return [result for result, key in results]
+
+
+def bulk_insert_products(items):
+    """ Ini untuk memasukan banyak product, unik berdasarkan nama """
+    return bulk_insert(Product.__table__, ['nama'], validate_product, items,
+                       'Product already exists.')
+
+
+def bulk_insert_distributors(items):
+    """ Ini untuk memasukan banyak distributor, unik berdasarkan perusahaan dan barang """
+    return bulk_insert(Distributor.__table__, ['perusahaan', 'barang'],
+                       validate_distributor, items, 'Distributor already exists.')
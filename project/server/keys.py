@@ -0,0 +1,139 @@
+# project/server/keys.py
+
+
+import json
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
+
+# nama kurva cryptography ke nama kurva JWK
+EC_CURVES = {
+    'secp256r1': 'P-256',
+    'secp384r1': 'P-384',
+    'secp521r1': 'P-521',
+}
+
+
+def _int_to_base64url(value):
+    length = (value.bit_length() + 7) // 8
+    return base64url_encode(value.to_bytes(length, 'big')).decode('ascii')
+
+
+class SigningKey(object):
+    """
+    Ini untuk satu kunci di key ring. Material kunci langsung diubah menjadi
+    objek kunci saat aplikasi start, bukan pada setiap encode/decode.
+    """
+
+    def __init__(self, kid, algorithm, secret=None, private_key=None,
+                 public_key=None):
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms or algorithm == 'none':
+            raise ValueError('Unsupported JWT algorithm {}'.format(algorithm))
+        prepare = algorithms[algorithm].prepare_key
+        self.kid = kid
+        self.algorithm = algorithm
+        self.symmetric = algorithm.startswith('HS')
+        if self.symmetric:
+            if not secret:
+                raise ValueError('Key {} requires a secret'.format(kid))
+            self.signing_key = self.verifying_key = prepare(secret)
+        else:
+            self.signing_key = prepare(private_key) if private_key else None
+            if self.signing_key is not None:
+                self.verifying_key = self.signing_key.public_key()
+            elif public_key:
+                self.verifying_key = prepare(public_key)
+            else:
+                raise ValueError('Key {} requires a private or public key'.format(kid))
+
+    def jwk(self):
+        """
+        Ini untuk kunci publik dalam format JWK, kunci HMAC tidak pernah dipublikasikan
+        :return: dict|None
+        """
+        if self.symmetric:
+            return None
+        numbers = self.verifying_key.public_numbers()
+        key = {'kid': self.kid, 'alg': self.algorithm, 'use': 'sig'}
+        if hasattr(numbers, 'n'):
+            key.update(kty='RSA', n=_int_to_base64url(numbers.n),
+                       e=_int_to_base64url(numbers.e))
+        else:
+            key.update(kty='EC', crv=EC_CURVES.get(numbers.curve.name),
+                       x=_int_to_base64url(numbers.x),
+                       y=_int_to_base64url(numbers.y))
+        return key
+
+
+class KeyRing(object):
+    """
+    Ini untuk kumpulan kunci penandatangan token. Token baru ditandatangani
+    dengan JWT_SIGNING_KID dan diberi header kid, token diverifikasi dengan
+    kunci yang dipilih dari kid (lookup dict).
+    """
+
+    def __init__(self, app=None):
+        self.keys = {}
+        self.signing = None
+        self.legacy = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        entries = list(app.config.get('JWT_KEYS') or [])
+        keys_file = app.config.get('JWT_KEYS_FILE')
+        if keys_file:
+            with open(keys_file) as f:
+                entries.extend(json.load(f))
+        if not entries:
+            # tanpa konfigurasi, SECRET_KEY dipakai sebagai satu kunci HS256
+            entries = [{
+                'kid': 'default',
+                'algorithm': 'HS256',
+                'secret': app.config.get('SECRET_KEY')
+            }]
+        self.keys = {}
+        for entry in entries:
+            key = SigningKey(**entry)
+            self.keys[key.kid] = key
+        signing_kid = app.config.get('JWT_SIGNING_KID') or entries[0]['kid']
+        self.signing = self.keys[signing_kid]
+        if self.signing.signing_key is None:
+            raise ValueError('Signing key {} has no private key'.format(signing_kid))
+        # token lama tanpa header kid diverifikasi dengan kunci ini
+        self.legacy = self.keys.get(app.config.get('JWT_LEGACY_KID') or 'default')
+
+    def encode(self, payload):
+        """
+        Ini untuk menandatangani payload dengan kunci aktif
+        :return: bytes
+        """
+        key = self.signing
+        return jwt.encode(payload, key.signing_key, algorithm=key.algorithm,
+                          headers={'kid': key.kid})
+
+    def decode(self, auth_token):
+        """
+        Ini untuk memverifikasi token dengan kunci sesuai header kid
+        :return: dict payload
+        :raise jwt.InvalidTokenError: bila token atau kid tidak valid
+        """
+        kid = jwt.get_unverified_header(auth_token).get('kid')
+        key = self.keys.get(kid) if kid is not None else self.legacy
+        if key is None:
+            raise jwt.InvalidTokenError('Unknown key id')
+        # algoritma dikunci per kid supaya header alg tidak bisa ditukar
+        return jwt.decode(auth_token, key.verifying_key,
+                          algorithms=[key.algorithm])
+
+    def jwks(self):
+        """
+        Ini untuk daftar kunci publik (JWKS) agar service lain bisa
+        memverifikasi token sendiri
+        :return: dict
+        """
+        return {'keys': [
+            key.jwk() for key in self.keys.values() if not key.symmetric
+        ]}
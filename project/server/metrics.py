@@ -0,0 +1,244 @@
+# project/server/metrics.py
+
+
+import json
+import os
+import threading
+import time
+
+from project.multiprocess import metrics_files, metrics_path
+from project.server.timing import DEFAULT_BUCKETS
+
+# nama metric: (tipe, keterangan)
+FAMILIES = {
+    'http_requests_total': (
+        'counter', 'Requests handled, by method, url rule and status.'),
+    'http_request_duration_seconds': (
+        'histogram', 'Request duration by url rule (from RequestTiming).'),
+    'request_phase_duration_seconds': (
+        'histogram', 'Time spent in auth, hash (bcrypt) and serialize phases.'),
+    'auth_token_decode_total': (
+        'counter', 'Auth token checks by outcome.'),
+    'cache_hits_total': ('counter', 'Cache hits by cache.'),
+    'cache_misses_total': ('counter', 'Cache misses by cache.'),
+    'db_pool_size': ('gauge', 'Configured pool size per worker.'),
+    'db_pool_checked_out': ('gauge', 'Connections in use per worker.'),
+    'db_pool_idle': ('gauge', 'Idle connections per worker.'),
+    'db_pool_overflow': ('gauge', 'Overflow connections per worker.'),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return '{}{{{}}}'.format(name, ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in labels))
+
+
+class Metrics(object):
+    """
+    Ini untuk metric format Prometheus. Tiap worker gunicorn menulis nilai
+    metricnya ke file per pid di METRICS_DIR (paling sering sekali per
+    METRICS_FLUSH_INTERVAL), /metrics menjumlahkan file semua worker
+    sehingga hasil scrape tidak bergantung pada worker yang menjawab.
+    Tanpa METRICS_DIR metric hanya dari proses ini. Jumlah dan durasi
+    request diambil dari RequestTiming lewat collector, bukan diukur lagi.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.flush_interval = 1.0
+        self.buckets = seconds_buckets(DEFAULT_BUCKETS)
+        self.collectors = []
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config.get('METRICS_DIR')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 1.0)
+        # bucket sama dengan histogram RequestTiming, dalam detik
+        self.buckets = seconds_buckets(
+            app.config.get('REQUEST_TIMING_BUCKETS') or DEFAULT_BUCKETS)
+        if self.directory and not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        app.extensions['metrics'] = self
+        app.after_request(self.maybe_flush)
+
+    def maybe_flush(self, response):
+        if self.directory and \
+                time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return response
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # jumlah per bucket lalu sum dan count
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 3)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-3] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def add_collector(self, collect):
+        """
+        Ini untuk mendaftarkan fungsi yang mengembalikan sample (name,
+        labels dict, value) dari extension lain, dipanggil saat flush/scrape
+        """
+        self.collectors.append(collect)
+
+    def samples(self):
+        """
+        Ini untuk semua sample proses ini
+        :return: dict nama series -> nilai
+        """
+        samples = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                samples[_series(name, labels)] = value
+            for (name, labels), histogram in self._histograms.items():
+                bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+                for bound, count in zip(bounds, histogram):
+                    samples[_series(name + '_bucket', labels + (('le', bound),))] = count
+                samples[_series(name + '_sum', labels)] = histogram[-2]
+                samples[_series(name + '_count', labels)] = histogram[-1]
+        for collect in self.collectors:
+            for name, labels, value in collect():
+                if FAMILIES.get(name, ('counter',))[0] == 'gauge':
+                    # gauge per worker tidak dijumlahkan, diberi label pid
+                    labels = dict(labels, pid=os.getpid())
+                samples[_series(name, _labels_key(labels))] = value
+        return samples
+
+    def flush(self):
+        """
+        Ini untuk menulis sample proses ini ke file pid (atomik lewat rename)
+        """
+        self._last_flush = time.monotonic()
+        path = metrics_path(self.directory, os.getpid())
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.samples(), f)
+        os.replace(tmp, path)
+
+    def clear(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def aggregate(self):
+        """
+        Ini untuk menjumlahkan sample semua worker
+        :return: dict nama series -> nilai
+        """
+        if not self.directory:
+            return self.samples()
+        self.flush()
+        totals = {}
+        for path in metrics_files(self.directory):
+            try:
+                with open(path) as f:
+                    samples = json.load(f)
+            except (IOError, ValueError):
+                # file worker yang sedang ditulis ulang, dilewati
+                continue
+            for series, value in samples.items():
+                totals[series] = totals.get(series, 0) + value
+        return totals
+
+    def render(self):
+        """
+        Ini untuk teks exposition format Prometheus
+        :return: string
+        """
+        by_family = {}
+        for series, value in self.aggregate().items():
+            base = series.split('{', 1)[0]
+            family = base
+            for suffix in ('_bucket', '_sum', '_count'):
+                if base.endswith(suffix) and base[:-len(suffix)] in FAMILIES:
+                    family = base[:-len(suffix)]
+            by_family.setdefault(family, []).append((series, value))
+        lines = []
+        for family in sorted(by_family):
+            kind, help_text = FAMILIES.get(family, ('untyped', ''))
+            lines.append('# HELP {} {}'.format(family, help_text))
+            lines.append('# TYPE {} {}'.format(family, kind))
+            for series, value in by_family[family]:
+                lines.append('{} {}'.format(series, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+def seconds_buckets(milliseconds):
+    return tuple(bound / 1000.0 for bound in milliseconds)
+
+
+def request_collector(request_timing):
+    """
+    Ini untuk sample jumlah request dan histogram durasi dari RequestTiming,
+    sehingga setiap request hanya diukur satu kali
+    """
+    def collect():
+        for (method, rule, status), count in request_timing.request_counts():
+            yield 'http_requests_total', {
+                'method': method, 'rule': rule, 'status': status}, count
+        bounds = [repr(bound) for bound in seconds_buckets(request_timing.buckets)]
+        for rule, counts, count, total in request_timing.histogram_items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds + ['+Inf'], counts):
+                cumulative += bucket_count
+                yield 'http_request_duration_seconds_bucket', {
+                    'rule': rule, 'le': bound}, cumulative
+            yield 'http_request_duration_seconds_sum', {'rule': rule}, total / 1000.0
+            yield 'http_request_duration_seconds_count', {'rule': rule}, count
+    return collect
+
+
+def pool_collector(pool_monitor):
+    """
+    Ini untuk sample kondisi pool koneksi database worker ini
+    """
+    def collect():
+        stats = pool_monitor.stats()
+        for name, key in (('db_pool_size', 'size'),
+                          ('db_pool_checked_out', 'checked_out'),
+                          ('db_pool_idle', 'idle'),
+                          ('db_pool_overflow', 'overflow')):
+            if stats[key] is not None:
+                yield name, {}, stats[key]
+    return collect
+
+
+def cache_collector(name, cache):
+    """
+    Ini untuk sample hit dan miss dari cache yang punya method stats()
+    """
+    def collect():
+        stats = cache.stats()
+        yield 'cache_hits_total', {'cache': name}, stats['hits']
+        yield 'cache_misses_total', {'cache': name}, stats['misses']
+    return collect
@@ -3,8 +3,19 @@
 
 import jwt
 import datetime
+import secrets
+import uuid
 
-from project.server import app, db, bcrypt
+from sqlalchemy import event, inspect
+
+from project.server import (
+    app, db, key_ring, metrics, password_hasher, token_cache
+)
+from project.server.blacklist import BlacklistIndex
+from project.server.tokens import token_digest
+
+# format registered_on di dalam claims token
+CLAIMS_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
 
 
 class User(db.Model):
@@ -16,18 +27,34 @@ class User(db.Model):
     password = db.Column(db.String(255), nullable=False)
     registered_on = db.Column(db.DateTime, nullable=False)
     admin = db.Column(db.Boolean, nullable=False, default=False)
+    # dinaikkan setiap data user berubah, token dengan versi lama ditolak
+    token_version = db.Column(db.Integer, nullable=False, default=0,
+                              server_default='0')
 
     def __init__(self, email, password, admin=False):
         self.email = email
-        self.password = bcrypt.generate_password_hash(
-            password, app.config.get('BCRYPT_LOG_ROUNDS')
-        ).decode()
+        self.password = password_hasher.generate(password)
         self.registered_on = datetime.datetime.now()
         self.admin = admin
+        self.token_version = 0
+
+    def claims(self):
+        """
+        Ini untuk data user yang ikut disimpan di dalam token
+        :return: dict
+        """
+        return {
+            'v': app.config.get('JWT_CLAIMS_VERSION'),
+            'tv': self.token_version,
+            'email': self.email,
+            'admin': self.admin,
+            'registered_on': self.registered_on.strftime(CLAIMS_DATETIME_FORMAT)
+        }
 
     def encode_auth_token(self, user_id):
         """
-        Ini untuk menghasilkan authentikasi token
+        Ini untuk menghasilkan authentikasi token.
+        Bila JWT_USER_CLAIMS aktif, data user ikut disimpan di claim 'usr'.
         :return: string
         """
         try:
@@ -36,11 +63,9 @@ class User(db.Model):
                 'iat': datetime.datetime.utcnow(),
                 'sub': user_id
             }
-            return jwt.encode(
-                payload,
-                app.config.get('SECRET_KEY'),
-                algorithm='HS256'
-            )
+            if app.config.get('JWT_USER_CLAIMS'):
+                payload['usr'] = self.claims()
+            return key_ring.encode(payload)
         except Exception as e:
             return e
 
@@ -51,53 +76,322 @@ class User(db.Model):
         :param auth_token:
         :return: integer|string
         """
+        payload = User.decode_auth_payload(auth_token)
+        if isinstance(payload, str):
+            return payload
+        return payload['sub']
+
+    @staticmethod
+    def decode_auth_payload(auth_token):
+        """
+        Ini untuk memvalidasi authentikasi token dan mengembalikan payloadnya
+        :param auth_token:
+        :return: dict|string
+        """
+        # token yang sama sering dikirim berulang, cek cache terlebih dahulu
+        # token yang sudah di-cache tetap dicek ke index blacklist (di memori),
+        # karena logout di worker lain tidak menghapus cache worker ini
+        payload = token_cache.get(auth_token)
+        if payload is not None and not blacklist_index.might_contain(auth_token):
+            metrics.inc('auth_token_decode_total', outcome='valid')
+            return payload
         try:
-            payload = jwt.decode(auth_token, app.config.get('SECRET_KEY'))
-            is_blacklisted_token = BlacklistToken.check_blacklist(auth_token)
-            if is_blacklisted_token:
-                return 'Token blacklisted. Please log in again.'
-            else:
-                return payload['sub']
+            payload = key_ring.decode(auth_token)
+            # logout dan perubahan user tidak boleh tertinggal replikasi
+            with db.session().primary():
+                is_blacklisted_token = BlacklistToken.check_blacklist(auth_token)
+                if is_blacklisted_token:
+                    metrics.inc('auth_token_decode_total', outcome='blacklisted')
+                    return 'Token blacklisted. Please log in again.'
+                if 'usr' in payload and not User.token_version_matches(payload):
+                    metrics.inc('auth_token_decode_total', outcome='revoked')
+                    return 'Token revoked. Please log in again.'
+            token_cache.set(auth_token, payload, payload['exp'])
+            metrics.inc('auth_token_decode_total', outcome='valid')
+            return payload
         except jwt.ExpiredSignatureError:
+            metrics.inc('auth_token_decode_total', outcome='expired')
             return 'Signature expired. Please log in again.'
         except jwt.InvalidTokenError:
+            metrics.inc('auth_token_decode_total', outcome='invalid')
             return 'Invalid token. Please log in again.'
 
+    @staticmethod
+    def token_version_matches(payload):
+        """
+        Ini untuk memastikan claims di token masih sesuai dengan data user,
+        hanya membaca kolom token_version (dilakukan saat token belum ada di cache)
+        :return: boolean
+        """
+        token_version = db.session.query(User.token_version).filter(
+            User.id == payload['sub']).scalar()
+        return token_version is not None and \
+            token_version == payload['usr'].get('tv')
+
+    @staticmethod
+    def user_claims(payload):
+        """
+        Ini untuk mengambil claims user dari payload token yang sudah diverifikasi
+        :return: dict|None bila token tidak membawa claims versi sekarang
+        """
+        claims = payload.get('usr')
+        if not claims or claims.get('v') != app.config.get('JWT_CLAIMS_VERSION'):
+            return None
+        return dict(
+            claims,
+            registered_on=datetime.datetime.strptime(
+                claims['registered_on'], CLAIMS_DATETIME_FORMAT)
+        )
+
+
+@event.listens_for(User, 'before_update')
+def bump_token_version(mapper, connection, target):
+    # data user berubah, token lama yang membawa claims tidak berlaku lagi
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes()
+           for name in ('email', 'password', 'admin')):
+        target.token_version = (target.token_version or 0) + 1
+        token_cache.invalidate_user(target.id)
+
+
+def delete_expired(table, now, batch_size):
+    """
+    Ini untuk menghapus baris dengan expires_at < now per batch, setiap
+    batch di-commit sendiri supaya lock tidak ditahan lama
+    :return: integer jumlah baris yang dihapus
+    """
+    total = 0
+    while True:
+        expired = db.select([table.c.id]).where(
+            table.c.expires_at < now
+        ).limit(batch_size)
+        result = db.session.execute(
+            table.delete().where(table.c.id.in_(expired))
+        )
+        db.session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
 
 class BlacklistToken(db.Model):
     """
-    Ini untuk menyimpan token yang sudah di blacklist
+    Ini untuk menyimpan token yang sudah di blacklist.
+    Yang disimpan hanya digest sha256 dari token beserta waktu expirednya,
+    sehingga baris yang tokennya sudah expired bisa dihapus.
     """
     __tablename__ = 'blacklist_tokens'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    token = db.Column(db.String(500), unique=True, nullable=False)
-    blacklisted_on = db.Column(db.DateTime, nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    blacklisted_on = db.Column(db.DateTime, nullable=False, index=True)
+    # waktu exp dari token (UTC)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
 
     def __init__(self, token):
-        self.token = token
+        self.token_hash = token_digest(token)
         self.blacklisted_on = datetime.datetime.now()
+        self.expires_at = BlacklistToken.token_expiry(token)
 
     def __repr__(self):
-        return '<id: token: {}'.format(self.token)
+        return '<id: token_hash: {}'.format(self.token_hash)
+
+    @staticmethod
+    def token_expiry(auth_token):
+        """
+        Ini untuk mengambil waktu exp dari token tanpa verifikasi signature
+        :param auth_token:
+        :return: datetime
+        """
+        try:
+            payload = jwt.decode(auth_token, verify=False)
+            return datetime.datetime.utcfromtimestamp(int(payload['exp']))
+        except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+            # token tanpa exp tidak pernah diterbitkan oleh aplikasi ini
+            return datetime.datetime.utcnow()
 
     @staticmethod
     def check_blacklist(auth_token):
         # check whether auth token has been blacklisted
-        res = BlacklistToken.query.filter_by(token=str(auth_token)).first()
+        # hampir semua token tidak diblacklist, jadi cek index dulu
+        if not blacklist_index.might_contain(auth_token):
+            return False
+        res = BlacklistToken.query.filter_by(
+            token_hash=token_digest(auth_token)
+        ).first()
         if res:
             return True
         else:
             return False
 
+    @staticmethod
+    def blacklisted_since(since=None):
+        """
+        Ini untuk mengambil digest token yang diblacklist sejak waktu tertentu
+        :param since: datetime|None
+        :return: list
+        """
+        table = BlacklistToken.__table__
+        query = db.select([table.c.token_hash, table.c.blacklisted_on])
+        if since is not None:
+            query = query.where(table.c.blacklisted_on >= since)
+        # memakai koneksi terpisah supaya tidak mengganggu session request
+        return [tuple(row) for row in db.engine.execute(query).fetchall()]
+
+    @staticmethod
+    def prune_expired(batch_size=1000, now=None):
+        """
+        Ini untuk menghapus token yang sudah expired secara bertahap
+        :param batch_size:
+        :param now: datetime (UTC)|None
+        :return: integer jumlah baris yang dihapus
+        """
+        if now is None:
+            now = datetime.datetime.utcnow() - datetime.timedelta(
+                seconds=app.config.get('BLACKLIST_PRUNE_GRACE', 0))
+        total = delete_expired(BlacklistToken.__table__, now, batch_size)
+        if total:
+            # digest token yang dihapus dibuang juga dari index worker ini
+            blacklist_index.sync(force=True, rebuild=True)
+        return total
+
+
+blacklist_index = BlacklistIndex(BlacklistToken.blacklisted_since, app)
+
+
+@event.listens_for(BlacklistToken, 'after_insert')
+def index_blacklist_token(mapper, connection, target):
+    # token baru langsung masuk index di worker ini
+    blacklist_index.add_digest(target.token_hash)
+
+
+class RefreshToken(db.Model):
+    """
+    Ini untuk menyimpan refresh token. Yang disimpan hanya digest sha256.
+    Setiap refresh token hanya bisa dipakai sekali (rotasi); token-token
+    hasil rotasi dari satu login berada di family yang sama sehingga
+    pemakaian ulang token lama mencabut seluruh family.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'),
+                        nullable=False, index=True)
+    family = db.Column(db.String(32), nullable=False, index=True)
+    # token_version user saat token dibuat
+    token_version = db.Column(db.Integer, nullable=False, default=0)
+    issued_at = db.Column(db.DateTime, nullable=False)
+    # waktu expired (UTC)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    used_at = db.Column(db.DateTime, nullable=True)
+    revoked = db.Column(db.Boolean, nullable=False, default=False)
+
+    @staticmethod
+    def issue(user, family=None):
+        """
+        Ini untuk membuat refresh token baru (belum di-commit)
+        :param user: User
+        :param family: family token sebelumnya|None untuk login baru
+        :return: string refresh token
+        """
+        refresh_token = secrets.token_urlsafe(32)
+        now = datetime.datetime.utcnow()
+        db.session.add(RefreshToken(
+            token_hash=token_digest(refresh_token),
+            user_id=user.id,
+            family=family or uuid.uuid4().hex,
+            token_version=user.token_version or 0,
+            issued_at=now,
+            expires_at=now + datetime.timedelta(
+                seconds=app.config.get('REFRESH_TOKEN_TTL')),
+            revoked=False
+        ))
+        return refresh_token
+
+    @staticmethod
+    def revoke_family(family):
+        """ Ini untuk mencabut semua refresh token dalam satu family """
+        table = RefreshToken.__table__
+        db.session.execute(
+            table.update().where(table.c.family == family).values(revoked=True))
+
+    @staticmethod
+    def revoke(refresh_token, user_id):
+        """ Ini untuk mencabut family dari refresh token milik user tertentu """
+        table = RefreshToken.__table__
+        family = db.session.execute(db.select([table.c.family]).where(
+            (table.c.token_hash == token_digest(refresh_token)) &
+            (table.c.user_id == user_id)
+        )).scalar()
+        if family is not None:
+            RefreshToken.revoke_family(family)
+
+    @staticmethod
+    def rotate(refresh_token):
+        """
+        Ini untuk menukar refresh token dengan pasangan token baru.
+        Token lama ditandai terpakai dengan satu UPDATE bersyarat, sehingga
+        dua request dengan token yang sama tidak bisa sama-sama berhasil.
+        :return: tuple (user, auth_token, refresh_token)|string pesan error
+        """
+        table = RefreshToken.__table__
+        row = db.session.execute(db.select([
+            table.c.id, table.c.user_id, table.c.family,
+            table.c.token_version, table.c.expires_at
+        ]).where(table.c.token_hash == token_digest(refresh_token or ''))).first()
+        if row is None:
+            return 'Invalid refresh token.'
+        now = datetime.datetime.utcnow()
+        if row.expires_at < now:
+            return 'Refresh token expired. Please log in again.'
+        used = db.session.execute(table.update().where(
+            (table.c.id == row.id) & table.c.used_at.is_(None) &
+            (table.c.revoked == False)  # noqa: E712
+        ).values(used_at=now)).rowcount
+        if not used:
+            # token lama dipakai ulang, kemungkinan dicuri
+            RefreshToken.revoke_family(row.family)
+            db.session.commit()
+            return 'Refresh token reused. Please log in again.'
+        user = User.query.filter_by(id=row.user_id).first()
+        if user is None or user.token_version != row.token_version:
+            RefreshToken.revoke_family(row.family)
+            db.session.commit()
+            return 'Refresh token revoked. Please log in again.'
+        new_refresh_token = RefreshToken.issue(user, row.family)
+        db.session.commit()
+        return user, user.encode_auth_token(user.id), new_refresh_token
+
+    @staticmethod
+    def prune_expired(batch_size=1000, now=None):
+        """
+        Ini untuk menghapus refresh token yang sudah expired secara bertahap
+        :return: integer jumlah baris yang dihapus
+        """
+        if now is None:
+            now = datetime.datetime.utcnow()
+        return delete_expired(RefreshToken.__table__, now, batch_size)
+
+
 class Product(db.Model):
     """ Ini untuk mendeskripsikan table product """
     __tablename__ = "products"
+    __table_args__ = (
+        db.Index('ix_products_version_id', 'version', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    nama = db.Column(db.String(255), nullable=False)
+    nama = db.Column(db.String(255), nullable=False, unique=True, index=True)
     harga = db.Column(db.Integer, nullable=False)
     jumlah = db.Column(db.Integer, nullable=False)
+    # waktu terakhir baris berubah (UTC)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)
+    # versi katalog (catalog_versions) saat baris terakhir ditulis,
+    # urutannya mengikuti urutan commit sehingga dipakai oleh /changes
+    version = db.Column(db.Integer, nullable=False, default=0)
 
     def __init__(self, nama, harga, jumlah):
         self.nama = nama
@@ -107,11 +401,35 @@ class Product(db.Model):
 class Distributor(db.Model):
     """ ini untuk mendeskripsikan table distributor """
     __tablename__ = "distributors"
+    __table_args__ = (
+        db.Index('ix_distributors_perusahaan_barang', 'perusahaan', 'barang',
+                 unique=True),
+        db.Index('ix_distributors_version_id', 'version', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     perusahaan = db.Column(db.String(255), nullable=False)
     barang = db.Column(db.String(255), nullable=False)
+    # waktu terakhir baris berubah (UTC)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)
+    # versi katalog (catalog_versions) saat baris terakhir ditulis,
+    # urutannya mengikuti urutan commit sehingga dipakai oleh /changes
+    version = db.Column(db.Integer, nullable=False, default=0)
 
     def __init__(self, perusahaan, barang):
         self.perusahaan = perusahaan
         self.barang = barang
+
+
+class CatalogVersion(db.Model):
+    """
+    Ini untuk menyimpan nomor versi per tabel katalog, naik setiap kali
+    isi tabel berubah
+    """
+    __tablename__ = "catalog_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1 @@
+# project/server/ops/__init__.py
@@ -0,0 +1,70 @@
+# project/server/ops/views.py
+
+
+from flask import Blueprint, Response, make_response
+from flask.views import MethodView
+
+from project.server import metrics, pool_monitor, replica_router, request_timing
+from project.server.encoding import jsonify
+
+ops_blueprint = Blueprint('ops', __name__)
+
+
+class PoolHealthAPI(MethodView):
+    """
+    Ini berisi method untuk melihat kondisi pool koneksi database
+    di worker yang melayani request
+    """
+    def get(self):
+        responseObject = {
+            'status': 'success',
+            'data': dict(pool_monitor.stats(), replicas=replica_router.stats())
+        }
+        return make_response(jsonify(responseObject)), 200
+
+
+class TimingHealthAPI(MethodView):
+    """
+    Ini berisi method untuk melihat histogram durasi request per endpoint
+    di worker yang melayani request
+    """
+    def get(self):
+        responseObject = {
+            'status': 'success',
+            'data': request_timing.snapshot()
+        }
+        return make_response(jsonify(responseObject)), 200
+
+
+class MetricsAPI(MethodView):
+    """
+    Ini berisi method untuk metric format Prometheus, dijumlahkan
+    dari semua worker gunicorn
+    """
+    def get(self):
+        return Response(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+# mendefinisikan api
+pool_health_view = PoolHealthAPI.as_view('pool_health_api')
+timing_health_view = TimingHealthAPI.as_view('timing_health_api')
+metrics_view = MetricsAPI.as_view('metrics_api')
+# membuat endpoint untuk api
+ops_blueprint.add_url_rule(
+    '/health/pool',
+    view_func=pool_health_view,
+    methods=['GET']
+)
+ops_blueprint.add_url_rule(
+    '/health/timing',
+    view_func=timing_health_view,
+    methods=['GET']
+)
+ops_blueprint.add_url_rule(
+    '/metrics',
+    view_func=metrics_view,
+    methods=['GET']
+)
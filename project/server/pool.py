@@ -0,0 +1,99 @@
+# project/server/pool.py
+
+
+import os
+
+from sqlalchemy import event, exc, select
+from sqlalchemy.engine import Engine
+
+
+class PoolMonitor(object):
+    """
+    Ini untuk mengurus pool koneksi database: pre-ping sebelum koneksi
+    dipakai, warm-up saat worker start dan statistik pool per worker
+    """
+
+    def __init__(self, db, app=None):
+        self.db = db
+        self.app = app
+        self.pre_ping = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.pre_ping = app.config.get('SQLALCHEMY_POOL_PRE_PING', False)
+        event.listen(Engine, 'engine_connect', self.ping_connection)
+
+    def ping_connection(self, connection, branch):
+        """
+        Ini untuk memastikan koneksi dari pool masih hidup (SQLAlchemy 1.1
+        belum punya pool_pre_ping). Koneksi yang putus dibuang oleh pool
+        lalu SELECT 1 dicoba lagi dengan koneksi baru.
+        """
+        if branch or not self.pre_ping:
+            return
+        should_close = connection.should_close_with_result
+        connection.should_close_with_result = False
+        try:
+            connection.scalar(select([1]))
+        except exc.DBAPIError as err:
+            if err.connection_invalidated:
+                connection.scalar(select([1]))
+            else:
+                raise
+        finally:
+            connection.should_close_with_result = should_close
+
+    def warm_up(self, count=None):
+        """
+        Ini untuk membuka beberapa koneksi sekaligus lalu mengembalikannya
+        ke pool, supaya request pertama tidak menunggu koneksi baru
+        :param count: jumlah koneksi, default SQLALCHEMY_POOL_WARMUP
+        :return: integer jumlah koneksi yang dibuka
+        """
+        if count is None:
+            count = self.app.config.get('SQLALCHEMY_POOL_WARMUP') or 0
+        with self.app.app_context():
+            engine = self.db.engine
+            connections = []
+            try:
+                for _ in range(count):
+                    connections.append(engine.connect())
+            finally:
+                for connection in connections:
+                    connection.close()
+        return len(connections)
+
+    def dispose(self):
+        """
+        Ini untuk membuang koneksi yang diwarisi dari proses master
+        (gunicorn --preload) sebelum worker memakai pool sendiri
+        """
+        with self.app.app_context():
+            self.db.engine.dispose()
+
+    def stats(self):
+        """
+        Ini untuk statistik pool di worker ini
+        :return: dict
+        """
+        pool = self.db.engine.pool
+
+        def count(name):
+            method = getattr(pool, name, None)
+            return method() if method is not None else None
+
+        overflow = count('overflow')
+        return {
+            'pid': os.getpid(),
+            'pool': type(pool).__name__,
+            'size': count('size'),
+            'checked_out': count('checkedout'),
+            'idle': count('checkedin'),
+            # QueuePool menghitung overflow mulai dari -size
+            'overflow': max(overflow, 0) if overflow is not None else None,
+            'max_overflow': getattr(pool, '_max_overflow', None),
+            'timeout': getattr(pool, '_timeout', None),
+            'pre_ping': self.pre_ping,
+        }
@@ -0,0 +1,114 @@
+# project/server/profiler.py
+
+
+import collections
+import logging
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfiler(object):
+    """
+    Ini untuk memantau query per request: query yang lebih lama dari
+    SLOW_QUERY_THRESHOLD dicatat (dengan EXPLAIN bila SLOW_QUERY_EXPLAIN),
+    query dengan SQL yang sama berulang dalam satu request ditandai
+    sebagai kemungkinan N+1, dan jumlah query per request dibandingkan
+    dengan QUERY_BUDGET.
+    """
+
+    def __init__(self, app=None):
+        self.slow_threshold = None
+        self.explain = False
+        self.repeat_threshold = None
+        self.budget = None
+        # pelanggaran dikumpulkan supaya test bisa gagal (BaseTestCase)
+        self.violations = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(app.config)
+        app.extensions['query_profiler'] = self
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        event.listen(Engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def configure(self, config):
+        self.slow_threshold = config.get('SLOW_QUERY_THRESHOLD')
+        self.explain = config.get('SLOW_QUERY_EXPLAIN', False)
+        self.repeat_threshold = config.get('N_PLUS_ONE_THRESHOLD')
+        self.budget = config.get('QUERY_BUDGET')
+        self.violations = []
+
+    def start_request(self):
+        g.query_statements = collections.Counter()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters,
+                              context, executemany):
+        if context is not None:
+            context._profile_start = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters,
+                             context, executemany):
+        if has_request_context():
+            statements = g.get('query_statements')
+            if statements is not None:
+                statements[statement] += 1
+        start = getattr(context, '_profile_start', None)
+        if start is None or self.slow_threshold is None:
+            return
+        duration = time.perf_counter() - start
+        if duration < self.slow_threshold:
+            return
+        plan = None
+        if self.explain and not executemany and \
+                statement.lstrip().upper().startswith('SELECT'):
+            plan = self.explain_plan(conn, statement, parameters)
+        logger.warning('Slow query %.1fms: %s%s', duration * 1000, statement,
+                       '\n' + plan if plan else '')
+
+    @staticmethod
+    def explain_plan(conn, statement, parameters):
+        """
+        Ini untuk menjalankan EXPLAIN dengan cursor DBAPI langsung, sehingga
+        tidak memicu event engine lagi
+        :return: string|None
+        """
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return '\n'.join(
+                ' '.join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception as e:
+            return 'EXPLAIN failed: {}'.format(e)
+        finally:
+            cursor.close()
+
+    def finish_request(self, response):
+        statements = g.pop('query_statements', None)
+        if statements is None:
+            return response
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        if self.repeat_threshold:
+            for statement, count in statements.items():
+                if count >= self.repeat_threshold:
+                    self.report('Possible N+1 on {} {}: {} identical queries: {}'.format(
+                        request.method, rule, count, statement))
+        total = sum(statements.values())
+        if self.budget is not None and total > self.budget:
+            self.report('Query budget exceeded on {} {}: {} queries (budget {})'.format(
+                request.method, rule, total, self.budget))
+        return response
+
+    def report(self, message):
+        logger.warning(message)
+        self.violations.append(message)
+        # produksi hanya perlu log, simpan beberapa pelanggaran terakhir
+        del self.violations[:-100]
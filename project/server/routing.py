@@ -0,0 +1,187 @@
+# project/server/routing.py
+
+
+import contextlib
+import itertools
+
+import sqlalchemy
+from flask import has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine.url import make_url
+
+# method HTTP yang boleh dilayani dari replica
+READ_METHODS = ('GET', 'HEAD')
+
+# kunci di session.info untuk menandai session harus memakai primary
+PIN_KEY = 'pin_primary'
+# kunci di session.info untuk replica yang dipilih request ini
+REPLICA_KEY = 'replica'
+
+
+class RoutingSession(SignallingSession):
+    """
+    Ini untuk session yang mengirim query baca pada request GET/HEAD ke
+    replica. Flush, SELECT ... FOR UPDATE dan semua query setelah ada
+    penulisan di request yang sama tetap ke primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        router = self.app.extensions.get('replica_router')
+        if router is None or not router.engines or not self.reads_from_replica(clause):
+            return SignallingSession.get_bind(self, mapper, clause)
+        if mapper is not None and \
+                getattr(mapper.mapped_table, 'info', {}).get('bind_key') is not None:
+            return SignallingSession.get_bind(self, mapper, clause)
+        # satu request membaca dari satu replica supaya datanya konsisten
+        engine = self.info.get(REPLICA_KEY)
+        if engine is None:
+            engine = self.info[REPLICA_KEY] = router.select_engine()
+        return engine
+
+    def reads_from_replica(self, clause):
+        if self._flushing or self.info.get(PIN_KEY):
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if clause is None:
+            # session.connection() tanpa query, bisa dipakai untuk menulis
+            return False
+        if not isinstance(clause, sqlalchemy.sql.Select):
+            # insert/update/delete lewat session.execute tidak memicu flush
+            self.pin_primary()
+            return False
+        return getattr(clause, '_for_update_arg', None) is None
+
+    def pin_primary(self):
+        """
+        Ini untuk memaksa sisa request ini memakai primary
+        """
+        self.info[PIN_KEY] = True
+
+    @contextlib.contextmanager
+    def primary(self):
+        """
+        Ini untuk membaca dari primary di dalam blok with, misalnya data yang
+        tidak boleh tertinggal replikasi (blacklist token)
+        """
+        pinned = self.info.get(PIN_KEY)
+        self.info[PIN_KEY] = True
+        try:
+            yield self
+        finally:
+            if not pinned:
+                self.info.pop(PIN_KEY, None)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    Ini untuk Flask-SQLAlchemy yang membuat RoutingSession
+    """
+
+    # opsi yang hanya diterima QueuePool
+    queue_pool_options = ('pool_size', 'pool_timeout', 'max_overflow')
+
+    def create_session(self, options):
+        return RoutingSession(self, **options)
+
+    def apply_driver_hacks(self, app, info, options):
+        SQLAlchemy.apply_driver_hacks(self, app, info, options)
+        if info.drivername.startswith('sqlite'):
+            # SQLite memakai NullPool/StaticPool yang menolak opsi QueuePool
+            for option in self.queue_pool_options:
+                options.pop(option, None)
+
+
+class ReplicaRouter(object):
+    """
+    Ini untuk memilih engine replica dari SQLALCHEMY_REPLICA_URIS,
+    secara round robin atau replica dengan koneksi aktif paling sedikit
+    """
+
+    selections = ('round_robin', 'least_loaded')
+
+    def __init__(self, db, app=None):
+        self.db = db
+        self.engines = []
+        self.selection = 'round_robin'
+        self._counter = itertools.count()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(app)
+        app.extensions['replica_router'] = self
+
+        @app.before_request
+        def unpin_session():
+            # pin dan replica dari request sebelumnya (atau dari luar request) dibuang
+            info = self.db.session.info
+            info.pop(PIN_KEY, None)
+            info.pop(REPLICA_KEY, None)
+
+        event.listen(RoutingSession, 'after_flush', self.pin_after_flush)
+
+    def configure(self, app):
+        """
+        Ini untuk membuat ulang engine replica dari konfigurasi aplikasi
+        """
+        selection = app.config.get('SQLALCHEMY_REPLICA_SELECTION') or 'round_robin'
+        if selection not in self.selections:
+            raise ValueError('Unknown replica selection {}'.format(selection))
+        self.dispose()
+        self.selection = selection
+        self.engines = [
+            self.create_engine(app, uri)
+            for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+        ]
+
+    def create_engine(self, app, uri):
+        """
+        Ini untuk membuat engine replica dengan opsi pool yang sama seperti primary
+        """
+        info = make_url(uri)
+        options = {'convert_unicode': True}
+        self.db.apply_pool_defaults(app, options)
+        self.db.apply_driver_hacks(app, info, options)
+        return sqlalchemy.create_engine(info, **options)
+
+    @staticmethod
+    def pin_after_flush(session, flush_context):
+        # read-after-write: setelah menulis, baca dari primary
+        session.info[PIN_KEY] = True
+
+    def select_engine(self):
+        """
+        Ini untuk memilih satu engine replica
+        :return: Engine
+        """
+        start = next(self._counter) % len(self.engines)
+        if self.selection == 'least_loaded':
+            # mulai dari posisi bergilir supaya replica yang sama-sama
+            # kosong tidak selalu jatuh ke replica pertama
+            engines = self.engines[start:] + self.engines[:start]
+            return min(engines, key=self.load)
+        return self.engines[start]
+
+    @staticmethod
+    def load(engine):
+        checkedout = getattr(engine.pool, 'checkedout', None)
+        return checkedout() if checkedout is not None else 0
+
+    def dispose(self):
+        """
+        Ini untuk menutup koneksi replica, dipanggil setelah fork worker
+        """
+        for engine in self.engines:
+            engine.dispose()
+
+    def stats(self):
+        """
+        Ini untuk jumlah koneksi aktif per replica
+        :return: list of dict
+        """
+        return [{
+            'url': repr(engine.url),
+            'checked_out': self.load(engine),
+        } for engine in self.engines]
@@ -0,0 +1,229 @@
+# project/server/timing.py
+
+
+import bisect
+import contextlib
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# batas bucket histogram dalam milidetik
+DEFAULT_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def current_timer():
+    """
+    Ini untuk mengambil timer request yang sedang berjalan
+    :return: RequestTimer|None bila di luar request atau instrumentasi mati
+    """
+    if not has_request_context():
+        return None
+    return g.get('request_timer')
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Ini untuk mencatat lama satu fase request (auth, hash, serialize) ke
+    timer request dan metric, di luar request tidak mencatat apa-apa
+    """
+    if not has_request_context():
+        yield
+        return
+    timer = g.get('request_timer')
+    metrics = current_app.extensions.get('metrics')
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if timer is not None:
+            timer.add(name, seconds)
+        if metrics is not None:
+            metrics.observe('request_phase_duration_seconds', seconds, phase=name)
+
+
+class RequestTimer(object):
+    """
+    Ini untuk waktu per fase dan jumlah query dalam satu request
+    """
+
+    __slots__ = ('start', 'phases', 'queries')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total):
+        """
+        Ini untuk nilai header Server-Timing, durasi dalam milidetik
+        :return: string
+        """
+        metrics = [
+            '{};dur={:.2f}'.format(name, seconds * 1000)
+            for name, seconds in sorted(self.phases.items()) if name != 'db'
+        ]
+        metrics.append('db;dur={:.2f};desc="{} queries"'.format(
+            self.phases.get('db', 0.0) * 1000, self.queries))
+        metrics.append('total;dur={:.2f}'.format(total * 1000))
+        return ', '.join(metrics)
+
+
+class Histogram(object):
+    """
+    Ini untuk histogram durasi dengan bucket tetap (kumulatif saat dibaca)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        """
+        :return: dict dengan jumlah kumulatif per batas bucket
+        """
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            buckets.append([bound, cumulative])
+        return {'count': self.count, 'sum': round(self.sum, 3), 'buckets': buckets}
+
+
+class RequestTiming(object):
+    """
+    Ini untuk instrumentasi request: waktu per fase (auth, db, hash,
+    serialize), jumlah query, header Server-Timing, log terstruktur dan
+    histogram durasi per endpoint di proses ini
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.header = True
+        self.buckets = DEFAULT_BUCKETS
+        self.histograms = {}
+        # jumlah request per (method, rule, status)
+        self.requests = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('REQUEST_TIMING', True)
+        self.header = app.config.get('REQUEST_TIMING_HEADER', True)
+        self.buckets = tuple(app.config.get('REQUEST_TIMING_BUCKETS') or DEFAULT_BUCKETS)
+        app.extensions['request_timing'] = self
+        if not self.enabled:
+            return
+        app.before_request(self.start_timer)
+        app.after_request(self.finish_timer)
+        event.listen(Engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def start_timer(self):
+        g.request_timer = RequestTimer()
+
+    @staticmethod
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        if context is not None and current_timer() is not None:
+            context._timing_start = time.perf_counter()
+
+    @staticmethod
+    def after_cursor_execute(conn, cursor, statement, parameters, context,
+                             executemany):
+        start = getattr(context, '_timing_start', None)
+        if start is None:
+            return
+        timer = current_timer()
+        if timer is not None:
+            timer.add('db', time.perf_counter() - start)
+            timer.queries += 1
+
+    def finish_timer(self, response):
+        timer = g.pop('request_timer', None)
+        if timer is None:
+            return response
+        total = timer.total()
+        rule = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        self.observe(rule, total * 1000)
+        self.count(request.method, rule, response.status_code)
+        if self.header:
+            response.headers['Server-Timing'] = timer.server_timing(total)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                'request method=%s rule=%s status=%d total_ms=%.2f db_ms=%.2f '
+                'queries=%d auth_ms=%.2f hash_ms=%.2f serialize_ms=%.2f',
+                request.method, rule, response.status_code, total * 1000,
+                timer.phases.get('db', 0.0) * 1000, timer.queries,
+                timer.phases.get('auth', 0.0) * 1000,
+                timer.phases.get('hash', 0.0) * 1000,
+                timer.phases.get('serialize', 0.0) * 1000)
+        return response
+
+    def observe(self, rule, milliseconds):
+        with self._lock:
+            histogram = self.histograms.get(rule)
+            if histogram is None:
+                histogram = self.histograms[rule] = Histogram(self.buckets)
+            histogram.observe(milliseconds)
+
+    def count(self, method, rule, status):
+        key = (method, rule, status)
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def request_counts(self):
+        """
+        Ini untuk salinan jumlah request per (method, rule, status)
+        :return: list of ((method, rule, status), count)
+        """
+        with self._lock:
+            return list(self.requests.items())
+
+    def histogram_items(self):
+        """
+        Ini untuk salinan histogram per rule, dibaca oleh /metrics
+        :return: list of (rule, counts, count, sum)
+        """
+        with self._lock:
+            return [
+                (rule, list(histogram.counts), histogram.count, histogram.sum)
+                for rule, histogram in self.histograms.items()
+            ]
+
+    def snapshot(self):
+        """
+        Ini untuk histogram durasi request per endpoint di worker ini
+        :return: dict
+        """
+        with self._lock:
+            return {
+                rule: histogram.snapshot()
+                for rule, histogram in sorted(self.histograms.items())
+            }
+
+    def clear(self):
+        with self._lock:
+            self.histograms = {}
+            self.requests = {}
@@ -0,0 +1,117 @@
+# project/server/tokens.py
+
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def token_digest(auth_token):
+    """
+    Ini untuk menghasilkan digest sha256 dari token
+    :param auth_token:
+    :return: string
+    """
+    if not isinstance(auth_token, bytes):
+        auth_token = str(auth_token).encode('utf-8')
+    return hashlib.sha256(auth_token).hexdigest()
+
+
+class TokenCache(object):
+    """
+    Ini untuk menyimpan token yang sudah diverifikasi (LRU + TTL) di memori
+    proses, sehingga request berulang dengan token yang sama tidak perlu
+    verifikasi signature dan query blacklist lagi.
+    """
+
+    def __init__(self, app=None):
+        self.maxsize = 0
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('TOKEN_CACHE_SIZE', 0)
+        self.ttl = app.config.get('TOKEN_CACHE_TTL', 0)
+
+    def get(self, auth_token):
+        """
+        Ini untuk mengambil payload token dari cache
+        :param auth_token:
+        :return: dict|None
+        """
+        if self.maxsize <= 0:
+            return None
+        key = token_digest(auth_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, auth_token, payload, exp):
+        """
+        Ini untuk menyimpan payload token, entry tidak akan hidup
+        melebihi waktu exp dari token
+        :param auth_token:
+        :param payload:
+        :param exp: epoch detik
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = min(float(exp), time.time() + self.ttl)
+        key = token_digest(auth_token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, auth_token):
+        """ Ini untuk menghapus token dari cache (misalnya saat logout) """
+        with self._lock:
+            self._entries.pop(token_digest(auth_token), None)
+
+    def invalidate_user(self, user_id):
+        """
+        Ini untuk menghapus semua token milik satu user (payload sub),
+        statistik hits/misses tidak diubah
+        """
+        with self._lock:
+            keys = [key for key, (payload, expires_at) in self._entries.items()
+                    if payload.get('sub') == user_id]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        """ Ini untuk mengosongkan cache beserta statistiknya (dipakai test) """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Ini untuk menampilkan statistik cache
+        :return: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
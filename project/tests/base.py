@@ -3,12 +3,18 @@
 
 from flask_testing import TestCase
 
-from project.server import app, db
+from project.server import (
+    app, db, query_profiler, response_cache, token_cache
+)
+from project.server.models import blacklist_index
 
 
 class BaseTestCase(TestCase):
     """ Base Tests """
 
+    # batas query per request untuk test ini, None memakai QUERY_BUDGET
+    query_budget = None
+
     def create_app(self):
         app.config.from_object('project.server.config.TestingConfig')
         return app
@@ -16,7 +22,18 @@ class BaseTestCase(TestCase):
     def setUp(self):
         db.create_all()
         db.session.commit()
+        token_cache.clear()
+        response_cache.clear()
+        blacklist_index.clear()
+        query_profiler.configure(self.app.config)
+        if self.query_budget is not None:
+            query_profiler.budget = self.query_budget
 
     def tearDown(self):
         db.session.remove()
         db.drop_all()
+        # request yang melebihi budget query atau terindikasi N+1 membuat test gagal
+        violations = query_profiler.violations
+        query_profiler.violations = []
+        if violations:
+            self.fail('\n'.join(violations))
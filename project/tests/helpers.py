@@ -1 +1,40 @@
 # project/tests/helpers.py
+
+
+from project.server import db
+from project.server.models import User, Product
+
+
+def auth_headers(self):
+    """ Ini untuk membuat user dan header Authorization dengan tokennya """
+    user = User(
+        email='joe@gmail.com',
+        password='123456'
+    )
+    db.session.add(user)
+    db.session.commit()
+    auth_token = user.encode_auth_token(user.id).decode()
+    return dict(Authorization='Bearer ' + auth_token)
+
+
+def add_products(count):
+    """ Ini untuk memasukan sejumlah product contoh """
+    for i in range(count):
+        db.session.add(Product(nama='product %d' % i, harga=1000 + i, jumlah=i))
+    db.session.commit()
+
+class FakeRedis(object):
+    """ Pengganti client redis di memori untuk pengujian """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
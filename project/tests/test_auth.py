@@ -3,9 +3,13 @@
 
 import time
 import json
+import threading
 import unittest
+from unittest import mock
 
-from project.server import db
+from flask import g
+
+from project.server import db, password_hasher, token_cache
 from project.server.models import User, BlacklistToken
 from project.tests.base import BaseTestCase
 
@@ -31,6 +35,14 @@ def login_user(self, email, password):
     )
 
 
+def use_refresh_token(self, token):
+    return self.client.post(
+        '/auth/refresh',
+        data=json.dumps(dict(refresh_token=token)),
+        content_type='application/json'
+    )
+
+
 class TestAuthBlueprint(BaseTestCase):
 
     def test_registration(self):
@@ -83,6 +95,49 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertTrue(response.content_type == 'application/json')
             self.assertEqual(response.status_code, 200)
 
+    def test_login_when_hashing_queue_is_full(self):
+        """ Test for login rejected quickly while the bcrypt queue is full """
+        with self.client:
+            register_user(self, 'joe@gmail.com', '123456')
+            max_pending = password_hasher.max_pending
+            password_hasher.max_pending = 0
+            try:
+                response = login_user(self, 'joe@gmail.com', '123456')
+            finally:
+                password_hasher.max_pending = max_pending
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['status'] == 'fail')
+            self.assertTrue(data['message'] == 'Server is busy. Please try again.')
+            self.assertEqual(response.headers.get('Retry-After'), '1')
+            self.assertEqual(response.status_code, 503)
+
+    def test_login_when_hashing_pool_is_saturated(self):
+        """ Test for 503 while other requests occupy every hashing slot """
+        with self.client:
+            register_user(self, 'joe@gmail.com', '123456')
+            max_pending = password_hasher.max_pending
+            password_hasher.max_pending = password_hasher.max_workers
+            release = threading.Event()
+            busy = [
+                threading.Thread(target=password_hasher._run, args=(release.wait, 5))
+                for _ in range(password_hasher.max_workers)
+            ]
+            try:
+                for thread in busy:
+                    thread.start()
+                while password_hasher._pending < password_hasher.max_pending:
+                    time.sleep(0.01)
+                response = login_user(self, 'joe@gmail.com', '123456')
+            finally:
+                release.set()
+                for thread in busy:
+                    thread.join()
+                password_hasher.max_pending = max_pending
+            self.assertEqual(response.status_code, 503)
+            # setelah slot kosong login kembali berhasil
+            response = login_user(self, 'joe@gmail.com', '123456')
+            self.assertEqual(response.status_code, 200)
+
     def test_non_registered_user_login(self):
         """ Test for login of non-registered user """
         with self.client:
@@ -163,6 +218,23 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertTrue(data['message'] == 'Successfully logged out.')
             self.assertEqual(response.status_code, 200)
 
+    def test_logout_invalidates_cached_token(self):
+        """ Test that a cached token is rejected right after logout """
+        with self.client:
+            resp_login = register_user(self, 'joe@gmail.com', '123456')
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            headers = dict(Authorization='Bearer ' + auth_token)
+            response = self.client.get('/auth/status', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(token_cache.stats()['size'], 1)
+            response = self.client.post('/auth/logout', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(token_cache.stats()['size'], 0)
+            response = self.client.get('/auth/status', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Token blacklisted. Please log in again.')
+            self.assertEqual(response.status_code, 401)
+
     def test_invalid_logout(self):
         """ Testing logout after the token expires """
         with self.client:
@@ -260,6 +332,120 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertTrue(data['message'] == 'Token blacklisted. Please log in again.')
             self.assertEqual(response.status_code, 401)
 
+    def test_product_post_without_token(self):
+        """ Test that product inserts are rejected before reading the body """
+        with self.client:
+            response = self.client.post(
+                '/product', data='not json', content_type='application/json')
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Provide a valid auth token.')
+            self.assertEqual(response.status_code, 403)
+            response = self.client.post(
+                '/product', headers=dict(Authorization='Bearer'))
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Bearer token malformed.')
+            self.assertEqual(response.status_code, 401)
+
+    def test_token_decoded_once_per_request(self):
+        """ Test that the auth token is decoded once and kept on flask.g """
+        with self.client:
+            resp_register = register_user(self, 'joe@gmail.com', '123456')
+            auth_token = json.loads(resp_register.data.decode())['auth_token']
+            with mock.patch.object(
+                User, 'decode_auth_payload', wraps=User.decode_auth_payload
+            ) as decode:
+                response = self.client.get(
+                    '/auth/status',
+                    headers=dict(Authorization='Bearer ' + auth_token))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(decode.call_count, 1)
+                self.assertEqual(g.user.email, 'joe@gmail.com')
+
+    def test_user_status_from_token_claims(self):
+        """ Test that /auth/status is answered from token claims """
+        self.app.config['JWT_USER_CLAIMS'] = True
+        try:
+            with self.client:
+                resp_register = register_user(self, 'joe@gmail.com', '123456')
+                auth_token = json.loads(resp_register.data.decode())['auth_token']
+                with mock.patch.object(User, 'query') as query:
+                    response = self.client.get(
+                        '/auth/status',
+                        headers=dict(Authorization='Bearer ' + auth_token))
+                    self.assertFalse(query.called)
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(data['data']['email'] == 'joe@gmail.com')
+                self.assertTrue(data['data']['admin'] is False)
+                self.assertTrue(data['data']['registered_on'] is not None)
+        finally:
+            self.app.config['JWT_USER_CLAIMS'] = False
+
+    def test_refresh_token_rotation(self):
+        """ Test that a refresh token issues new tokens without bcrypt """
+        with self.client:
+            register_user(self, 'joe@gmail.com', '123456')
+            resp_login = login_user(self, 'joe@gmail.com', '123456')
+            refresh_token = json.loads(resp_login.data.decode())['refresh_token']
+            with mock.patch.object(password_hasher, 'check') as check:
+                response = use_refresh_token(self, refresh_token)
+                self.assertFalse(check.called)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(data['message'] == 'Successfully refreshed.')
+            self.assertNotEqual(data['refresh_token'], refresh_token)
+            response = self.client.get(
+                '/auth/status',
+                headers=dict(Authorization='Bearer ' + data['auth_token']))
+            self.assertEqual(response.status_code, 200)
+
+    def test_refresh_token_reuse_revokes_family(self):
+        """ Test that reusing a rotated refresh token revokes its family """
+        with self.client:
+            resp_register = register_user(self, 'joe@gmail.com', '123456')
+            first = json.loads(resp_register.data.decode())['refresh_token']
+            second = json.loads(use_refresh_token(self, first).data.decode())['refresh_token']
+            response = use_refresh_token(self, first)
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Refresh token reused. Please log in again.')
+            self.assertEqual(response.status_code, 401)
+            # token terbaru dari family yang sama ikut dicabut
+            response = use_refresh_token(self, second)
+            self.assertEqual(response.status_code, 401)
+            response = use_refresh_token(self, 'not-a-token')
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Invalid refresh token.')
+
+    def test_logout_revokes_refresh_token(self):
+        """ Test that logout can revoke the refresh token as well """
+        with self.client:
+            resp_login = register_user(self, 'joe@gmail.com', '123456')
+            data = json.loads(resp_login.data.decode())
+            response = self.client.post(
+                '/auth/logout',
+                headers=dict(Authorization='Bearer ' + data['auth_token']),
+                data=json.dumps(dict(refresh_token=data['refresh_token'])),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 200)
+            response = use_refresh_token(self, data['refresh_token'])
+            self.assertEqual(response.status_code, 401)
+
+    def test_logout_with_array_body(self):
+        """ Test that a non-object logout body is rejected before any work """
+        with self.client:
+            resp_login = register_user(self, 'joe@gmail.com', '123456')
+            headers = dict(Authorization='Bearer ' + json.loads(
+                resp_login.data.decode())['auth_token'])
+            response = self.client.post(
+                '/auth/logout', headers=headers,
+                data=json.dumps(['refresh']), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(BlacklistToken.query.count(), 0)
+            response = self.client.post('/auth/logout', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(BlacklistToken.query.count(), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,567 @@
+# project/tests/test_catalog.py
+
+
+import datetime
+import json
+import unittest
+
+from project.server import db, response_cache
+from project.server.cache import LRUBackend, RedisBackend
+from project.server.encoding import msgpack
+from project.server.models import Product, Distributor
+from project.tests.base import BaseTestCase
+from project.tests.helpers import FakeRedis, auth_headers, add_products
+
+
+class TestCatalogBlueprint(BaseTestCase):
+
+    def test_product_list_pagination(self):
+        """ Test for keyset pagination on product list """
+        headers = auth_headers(self)
+        add_products(5)
+        with self.client:
+            response = self.client.get(
+                '/product/list?limit=2', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data), 2)
+            self.assertEqual(data[0]['data']['nama'], 'product 0')
+            cursor = response.headers['X-Next-Cursor']
+            response = self.client.get(
+                '/product/list?limit=2&after_id=' + cursor, headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual([d['data']['nama'] for d in data],
+                             ['product 2', 'product 3'])
+            cursor = response.headers['X-Next-Cursor']
+            response = self.client.get(
+                '/product/list?limit=2&after_id=' + cursor, headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(len(data), 1)
+            self.assertTrue('X-Next-Cursor' not in response.headers)
+
+    def test_next_cursor_is_exposed_to_cors(self):
+        """ Test that browsers on another origin can read X-Next-Cursor """
+        headers = auth_headers(self)
+        add_products(3)
+        with self.client:
+            response = self.client.get(
+                '/product/list?limit=2',
+                headers=dict(headers, Origin='http://dashboard.example.com'))
+            self.assertTrue(response.headers['X-Next-Cursor'])
+            self.assertTrue('X-Next-Cursor' in
+                            response.headers['Access-Control-Expose-Headers'])
+
+    def test_product_list_page_size_is_capped(self):
+        """ Test that the server enforces the maximum page size """
+        headers = auth_headers(self)
+        add_products(3)
+        max_page_size = self.app.config['CATALOG_MAX_PAGE_SIZE']
+        self.app.config['CATALOG_MAX_PAGE_SIZE'] = 2
+        try:
+            with self.client:
+                response = self.client.get(
+                    '/product/list?limit=100', headers=headers)
+                data = json.loads(response.data.decode())
+                self.assertEqual(len(data), 2)
+                self.assertTrue(response.headers['X-Next-Cursor'])
+        finally:
+            self.app.config['CATALOG_MAX_PAGE_SIZE'] = max_page_size
+
+    def test_product_list_invalid_pagination(self):
+        """ Test for product list with invalid pagination parameters """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.get(
+                '/product/list?limit=abc', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['status'] == 'fail')
+            self.assertTrue(data['message'] == 'Invalid pagination parameters.')
+            self.assertEqual(response.status_code, 400)
+
+    def test_product_list_fields_projection(self):
+        """ Test for product list with a fields projection """
+        headers = auth_headers(self)
+        add_products(2)
+        with self.client:
+            response = self.client.get(
+                '/product/list?fields=harga,nama', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(data[0]['data'], {'nama': 'product 0', 'harga': 1000})
+
+    def test_product_list_unknown_field(self):
+        """ Test for product list with an unknown field """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.get(
+                '/product/list?fields=nama,password', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Invalid fields parameter.')
+            self.assertEqual(response.status_code, 400)
+
+    def test_distributor_list_pagination(self):
+        """ Test for keyset pagination on distributor list """
+        headers = auth_headers(self)
+        for i in range(3):
+            db.session.add(Distributor(perusahaan='pt %d' % i, barang='x'))
+        db.session.commit()
+        with self.client:
+            response = self.client.get(
+                '/distributor?limit=2&after_id=1', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([d['data']['perusahaan'] for d in data],
+                             ['pt 1', 'pt 2'])
+            self.assertTrue('X-Next-Cursor' not in response.headers)
+
+    def test_product_export_json_array(self):
+        """ Test for streaming product export as a JSON array """
+        headers = auth_headers(self)
+        add_products(5)
+        batch_size = self.app.config['CATALOG_EXPORT_BATCH_SIZE']
+        self.app.config['CATALOG_EXPORT_BATCH_SIZE'] = 2
+        try:
+            response = self.client.get('/product/export', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.content_type == 'application/json')
+            self.assertEqual([d['data']['nama'] for d in data],
+                             ['product %d' % i for i in range(5)])
+        finally:
+            self.app.config['CATALOG_EXPORT_BATCH_SIZE'] = batch_size
+
+    def test_product_export_ndjson(self):
+        """ Test for streaming product export as NDJSON """
+        headers = auth_headers(self)
+        add_products(3)
+        response = self.client.get(
+            '/product/export?format=ndjson', headers=headers)
+        lines = response.data.decode().splitlines()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type == 'application/x-ndjson')
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])['data']['product_id'], 3)
+
+    def test_export_empty_table(self):
+        """ Test for streaming export of an empty table """
+        headers = auth_headers(self)
+        response = self.client.get('/distributor/export', headers=headers)
+        self.assertEqual(json.loads(response.data.decode()), [])
+
+    def test_export_without_token(self):
+        """ Test for export without an auth token """
+        with self.client:
+            response = self.client.get('/product/export')
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Provide a valid auth token.')
+            self.assertEqual(response.status_code, 401)
+
+    def test_product_bulk_insert(self):
+        """ Test for bulk product insert with duplicates and invalid rows """
+        headers = auth_headers(self)
+        add_products(1)
+        items = [
+            dict(nama='product 0', harga=1, jumlah=1),
+            dict(nama='baru', harga=2, jumlah=3),
+            dict(nama='baru', harga=2, jumlah=3),
+            dict(nama='', harga=2, jumlah=3),
+        ]
+        with self.client:
+            response = self.client.post(
+                '/product/bulk',
+                data=json.dumps(items),
+                content_type='application/json',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(data['inserted'], 1)
+            self.assertEqual(data['skipped'], 2)
+            self.assertEqual(data['invalid'], 1)
+            self.assertEqual([r['status'] for r in data['results']],
+                             ['skipped', 'inserted', 'skipped', 'invalid'])
+            self.assertEqual(Product.query.count(), 2)
+
+    def test_product_bulk_insert_ndjson(self):
+        """ Test for bulk product insert with an NDJSON body """
+        headers = auth_headers(self)
+        body = '\n'.join(json.dumps(dict(nama='p%d' % i, harga=i, jumlah=i))
+                         for i in range(3))
+        with self.client:
+            response = self.client.post(
+                '/product/bulk',
+                data=body,
+                content_type='application/x-ndjson',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['inserted'], 3)
+            self.assertEqual(Product.query.count(), 3)
+
+    def test_product_bulk_insert_invalid_body(self):
+        """ Test for bulk product insert with a non-array body """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.post(
+                '/product/bulk',
+                data=json.dumps(dict(nama='x')),
+                content_type='application/json',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Invalid bulk body.')
+            self.assertEqual(response.status_code, 400)
+
+    def test_product_insert_duplicate(self):
+        """ Test for inserting a product whose nama already exists """
+        headers = auth_headers(self)
+        add_products(1)
+        with self.client:
+            response = self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='product 0', harga=1, jumlah=1)),
+                content_type='application/json',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['status'] == 'fail')
+            self.assertTrue(data['message'] == 'Product already exists.')
+            self.assertEqual(response.status_code, 202)
+            response = self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='product 1', harga=1, jumlah=1)),
+                content_type='application/json',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Successfully insert.')
+            self.assertEqual(Product.query.count(), 2)
+
+    def test_product_insert_is_validated(self):
+        """ Test that invalid products are rejected with 400 """
+        headers = auth_headers(self)
+        with self.client:
+            for body, message in (
+                    (dict(nama='tanpa harga', jumlah=1), 'Invalid harga.'),
+                    (dict(nama='', harga=1, jumlah=1), 'Invalid nama.'),
+                    ([dict(nama='list', harga=1, jumlah=1)], 'Item must be an object.')):
+                response = self.client.post(
+                    '/product',
+                    data=json.dumps(body),
+                    content_type='application/json',
+                    headers=headers
+                )
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(data['message'], message)
+            self.assertEqual(Product.query.count(), 0)
+
+    def test_product_insert_accepts_integer_strings(self):
+        """ Test that numeric strings are stored as integers """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='string', harga='1000', jumlah=' 5 ')),
+                content_type='application/json',
+                headers=headers
+            )
+            self.assertEqual(response.status_code, 200)
+            response = self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='float', harga='10.5', jumlah=1)),
+                content_type='application/json',
+                headers=headers
+            )
+            self.assertEqual(response.status_code, 400)
+        product = Product.query.filter_by(nama='string').first()
+        self.assertEqual((product.harga, product.jumlah), (1000, 5))
+
+    def test_distributor_insert_is_validated(self):
+        """ Test that a distributor without barang is rejected with 400 """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.post(
+                '/distributor',
+                data=json.dumps(dict(perusahaan='pt a')),
+                content_type='application/json',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(data['message'], 'Invalid barang.')
+            self.assertEqual(Distributor.query.count(), 0)
+
+    def test_distributor_insert(self):
+        """ Test for inserting a distributor and a duplicate """
+        headers = auth_headers(self)
+        with self.client:
+            for expected in ('Successfully insert.', 'Distributor already exists.'):
+                response = self.client.post(
+                    '/distributor',
+                    data=json.dumps(dict(perusahaan='pt a', barang='beras')),
+                    content_type='application/json',
+                    headers=headers
+                )
+                data = json.loads(response.data.decode())
+                self.assertTrue(data['message'] == expected)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(Distributor.query.count(), 1)
+
+    def test_distributor_bulk_insert(self):
+        """ Test for bulk distributor insert on (perusahaan, barang) """
+        headers = auth_headers(self)
+        db.session.add(Distributor(perusahaan='pt a', barang='beras'))
+        db.session.commit()
+        items = [
+            dict(perusahaan='pt a', barang='beras'),
+            dict(perusahaan='pt a', barang='gula'),
+            dict(perusahaan='pt b', barang='beras'),
+            dict(perusahaan='pt b', barang=None),
+        ]
+        with self.client:
+            response = self.client.post(
+                '/distributor/bulk',
+                data=json.dumps(items),
+                content_type='application/json',
+                headers=headers
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([r['status'] for r in data['results']],
+                             ['skipped', 'inserted', 'inserted', 'invalid'])
+            self.assertEqual(Distributor.query.count(), 3)
+
+    def test_product_list_conditional_get(self):
+        """ Test for ETag / If-None-Match on product list """
+        headers = auth_headers(self)
+        add_products(2)
+        with self.client:
+            response = self.client.get('/product/list', headers=headers)
+            etag = response.headers['ETag']
+            self.assertTrue(response.headers['Last-Modified'])
+            response = self.client.get(
+                '/product/list',
+                headers=dict(headers, **{'If-None-Match': etag})
+            )
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            # halaman lain punya ETag berbeda
+            response = self.client.get(
+                '/product/list?limit=1',
+                headers=dict(headers, **{'If-None-Match': etag})
+            )
+            self.assertEqual(response.status_code, 200)
+            self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='baru', harga=1, jumlah=1)),
+                content_type='application/json',
+                headers=headers
+            )
+            response = self.client.get(
+                '/product/list',
+                headers=dict(headers, **{'If-None-Match': etag})
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+            self.assertEqual(len(json.loads(response.data.decode())), 3)
+
+    def test_distributor_list_version_bumped_by_bulk(self):
+        """ Test that bulk distributor inserts change the list ETag """
+        headers = auth_headers(self)
+        with self.client:
+            etag = self.client.get('/distributor', headers=headers).headers['ETag']
+            self.client.post(
+                '/distributor/bulk',
+                data=json.dumps([dict(perusahaan='pt a', barang='beras')]),
+                content_type='application/json',
+                headers=headers
+            )
+            response = self.client.get(
+                '/distributor',
+                headers=dict(headers, **{'If-None-Match': etag})
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_product_list_response_cache(self):
+        """ Test for cached product list bodies and invalidation on commit """
+        headers = auth_headers(self)
+        add_products(2)
+        with self.client:
+            first = self.client.get('/product/list?limit=1', headers=headers)
+            second = self.client.get('/product/list?limit=1', headers=headers)
+            self.assertEqual(first.data, second.data)
+            self.assertEqual(second.headers['X-Next-Cursor'], '1')
+            self.assertEqual(response_cache.stats()['hits'], 1)
+            self.assertEqual(response_cache.stats()['misses'], 1)
+            # token tetap dicek sebelum cache dipakai
+            response = self.client.get('/product/list?limit=1')
+            self.assertEqual(response.status_code, 401)
+            invalidations = response_cache.stats()['invalidations']
+            self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='baru', harga=1, jumlah=1)),
+                content_type='application/json',
+                headers=headers
+            )
+            self.assertEqual(response_cache.stats()['invalidations'],
+                             invalidations + 1)
+            response = self.client.get('/product/list', headers=headers)
+            self.assertEqual(len(json.loads(response.data.decode())), 3)
+
+    def test_product_list_shared_cache_backend(self):
+        """ Test for the shared (redis) response cache backend """
+        headers = auth_headers(self)
+        add_products(1)
+        backend = response_cache.backend
+        response_cache.backend = RedisBackend(FakeRedis(), ttl=60)
+        try:
+            with self.client:
+                first = self.client.get('/product/list', headers=headers)
+                second = self.client.get('/product/list', headers=headers)
+                self.assertEqual(first.data, second.data)
+                self.assertEqual(response_cache.stats()['hits'], 1)
+        finally:
+            response_cache.backend = backend
+
+    def test_lru_backend_eviction(self):
+        """ Test for LRU eviction in the in-process backend """
+        backend = LRUBackend(2)
+        for key in ('a', 'b', 'c'):
+            backend.set(('products', 0, key), b'x')
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(backend.evictions, 1)
+        self.assertTrue(backend.get(('products', 0, 'a')) is None)
+
+    def test_product_list_columnar(self):
+        """ Test for the columnar representation of product list """
+        headers = auth_headers(self)
+        add_products(3)
+        with self.client:
+            response = self.client.get(
+                '/product/list?fields=nama,harga',
+                headers=dict(headers, Accept='application/vnd.catalog.columnar+json')
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype,
+                             'application/vnd.catalog.columnar+json')
+            self.assertEqual(data, {
+                'status': 'success',
+                'fields': ['nama', 'harga'],
+                'data': {
+                    'nama': ['product 0', 'product 1', 'product 2'],
+                    'harga': [1000, 1001, 1002]
+                }
+            })
+            self.assertTrue('Accept' in response.headers['Vary'])
+
+    def test_product_list_accept_keeps_json_default(self):
+        """ Test that JSON stays the default and formats get distinct ETags """
+        headers = auth_headers(self)
+        add_products(2)
+        with self.client:
+            response = self.client.get(
+                '/product/list', headers=dict(headers, Accept='*/*'))
+            self.assertEqual(response.mimetype, 'application/json')
+            etag = response.headers['ETag']
+            response = self.client.get(
+                '/product/list',
+                headers=dict(headers, **{
+                    'Accept': 'application/vnd.catalog.columnar+json',
+                    'If-None-Match': etag
+                })
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue('fields' in json.loads(response.data.decode()))
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_distributor_list_msgpack(self):
+        """ Test for the MessagePack representation of distributor list """
+        headers = auth_headers(self)
+        db.session.add(Distributor(perusahaan='pt a', barang='beras'))
+        db.session.commit()
+        with self.client:
+            response = self.client.get(
+                '/distributor', headers=dict(headers, Accept='application/x-msgpack'))
+            self.assertEqual(response.mimetype, 'application/x-msgpack')
+            data = msgpack.unpackb(response.data, raw=False)
+            self.assertEqual(data['fields'],
+                             ['distributor_id', 'perusahaan', 'barang'])
+            self.assertEqual(data['data']['barang'], ['beras'])
+
+    def test_product_changes_since_cursor(self):
+        """ Test for incremental product changes with a cursor """
+        headers = auth_headers(self)
+        add_products(3)
+        with self.client:
+            response = self.client.get(
+                '/product/changes?limit=2', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([d['nama'] for d in data['data']],
+                             ['product 0', 'product 1'])
+            self.assertTrue(data['has_more'])
+            self.assertTrue(data['data'][0]['updated_at'])
+            response = self.client.get(
+                '/product/changes?since=' + data['next_cursor'], headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual([d['nama'] for d in data['data']], ['product 2'])
+            self.assertFalse(data['has_more'])
+            cursor = data['next_cursor']
+            # tidak ada perubahan, cursor tetap sama
+            response = self.client.get(
+                '/product/changes?since=' + cursor, headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['data'], [])
+            self.assertEqual(data['next_cursor'], cursor)
+            product = Product.query.filter_by(nama='product 0').first()
+            product.harga = 5
+            db.session.commit()
+            response = self.client.get(
+                '/product/changes?since=' + cursor, headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual([(d['nama'], d['harga']) for d in data['data']],
+                             [('product 0', 5)])
+
+    def test_product_changes_follow_commit_order(self):
+        """ Test that rows stamped with an older time but committed later are returned """
+        headers = auth_headers(self)
+        add_products(2)
+        with self.client:
+            response = self.client.get('/product/changes', headers=headers)
+            cursor = json.loads(response.data.decode())['next_cursor']
+            # seperti transaksi bulk yang lama: waktu tulis lebih awal dari
+            # baris yang sudah dibagikan, tetapi commit setelahnya
+            product = Product(nama='late', harga=1, jumlah=1)
+            product.updated_at = datetime.datetime(2000, 1, 1)
+            db.session.add(product)
+            db.session.commit()
+            self.client.post(
+                '/product/bulk',
+                data=json.dumps([dict(nama='bulk', harga=1, jumlah=1)]),
+                content_type='application/json',
+                headers=headers
+            )
+            response = self.client.get(
+                '/product/changes?since=' + cursor, headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual([d['nama'] for d in data['data']], ['late', 'bulk'])
+            # cursor lama berbasis waktu ditolak
+            response = self.client.get(
+                '/product/changes?since=20261018070000000000-1', headers=headers)
+            self.assertEqual(response.status_code, 400)
+
+    def test_distributor_changes_invalid_cursor(self):
+        """ Test for distributor changes with an invalid cursor """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.get(
+                '/distributor/changes?since=abc', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['message'] == 'Invalid changes parameters.')
+            self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
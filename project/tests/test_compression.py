@@ -0,0 +1,92 @@
+# project/tests/test_compression.py
+
+
+import gzip
+import json
+import unittest
+
+from project.server import compress
+from project.server.compression import brotli
+from project.tests.base import BaseTestCase
+from project.tests.helpers import auth_headers, add_products
+
+
+class TestCompression(BaseTestCase):
+
+    def test_list_is_gzipped_above_threshold(self):
+        """ Test that large list responses are gzip compressed """
+        headers = auth_headers(self)
+        add_products(50)
+        with self.client:
+            response = self.client.get(
+                '/product/list', headers=dict(headers, **{'Accept-Encoding': 'gzip'}))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertTrue('Accept-Encoding' in response.headers['Vary'])
+            data = json.loads(gzip.decompress(response.data).decode())
+            self.assertEqual(len(data), 50)
+            self.assertEqual(int(response.headers['Content-Length']),
+                             len(response.data))
+
+    def test_small_response_is_not_compressed(self):
+        """ Test that responses below the threshold are sent as is """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.get(
+                '/auth/status', headers=dict(headers, **{'Accept-Encoding': 'gzip'}))
+            self.assertTrue('Content-Encoding' not in response.headers)
+            data = json.loads(response.data.decode())
+            self.assertTrue(data['status'] == 'success')
+
+    def test_no_compression_without_accept_encoding(self):
+        """ Test that clients without Accept-Encoding get plain bodies """
+        headers = auth_headers(self)
+        add_products(50)
+        with self.client:
+            response = self.client.get('/product/list', headers=headers)
+            self.assertTrue('Content-Encoding' not in response.headers)
+            self.assertEqual(len(json.loads(response.data.decode())), 50)
+
+    def test_streamed_export_is_gzipped(self):
+        """ Test that streamed exports are compressed chunk by chunk """
+        headers = auth_headers(self)
+        add_products(3)
+        response = self.client.get(
+            '/product/export?format=ndjson',
+            headers=dict(headers, **{'Accept-Encoding': 'gzip'}))
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(response.data).decode().splitlines()
+        self.assertEqual([json.loads(line)['data']['nama'] for line in lines],
+                         ['product 0', 'product 1', 'product 2'])
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_list_prefers_brotli(self):
+        """ Test that brotli is used when the client accepts it """
+        headers = auth_headers(self)
+        add_products(50)
+        with self.client:
+            response = self.client.get(
+                '/product/list',
+                headers=dict(headers, **{'Accept-Encoding': 'gzip, br'}))
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            data = json.loads(brotli.decompress(response.data).decode())
+            self.assertEqual(len(data), 50)
+
+    def test_compress_levels(self):
+        """ Test that COMPRESS_GZIP_LEVEL is applied """
+        body = b'{"status": "success"}' * 100
+        levels = compress.levels
+        self.assertEqual(levels['gzip'], self.app.config['COMPRESS_GZIP_LEVEL'])
+        try:
+            # byte XFL header gzip: 4 untuk level 1, 2 untuk level 9
+            for level, xfl in ((1, 4), (9, 2)):
+                compress.levels = dict(levels, gzip=level)
+                data = compress.compress('gzip', body)
+                self.assertEqual(data[8], xfl)
+                self.assertEqual(gzip.decompress(data), body)
+        finally:
+            compress.levels = levels
+
+
+if __name__ == '__main__':
+    unittest.main()
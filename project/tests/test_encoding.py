@@ -0,0 +1,46 @@
+# project/tests/test_encoding.py
+
+
+import datetime
+import json
+import unittest
+
+from project.server import json_provider
+from project.server.encoding import jsonify
+from project.tests.base import BaseTestCase
+
+
+class TestEncoding(BaseTestCase):
+
+    def test_dumps_exception_message(self):
+        """ Test that exceptions put into a response are serialized as text """
+        body = json_provider.dumps({'status': 'fail', 'message': ValueError('boom')})
+        self.assertEqual(json.loads(body.decode()),
+                         {'status': 'fail', 'message': 'boom'})
+
+    def test_dumps_datetime_http_format(self):
+        """ Test that datetimes keep the http date format by default """
+        body = json_provider.dumps({'at': datetime.datetime(2020, 1, 2, 3, 4, 5)})
+        self.assertEqual(json.loads(body.decode()),
+                         {'at': 'Thu, 02 Jan 2020 03:04:05 GMT'})
+
+    def test_dumps_datetime_iso_format(self):
+        """ Test that JSON_DATETIME_FORMAT=iso switches to isoformat """
+        json_provider.datetime_format = 'iso'
+        try:
+            body = json_provider.dumps(
+                {'at': datetime.datetime(2020, 1, 2, 3, 4, 5)})
+        finally:
+            json_provider.datetime_format = 'http'
+        self.assertEqual(json.loads(body.decode()), {'at': '2020-01-02T03:04:05'})
+
+    def test_jsonify_response(self):
+        """ Test that jsonify builds an application/json response """
+        with self.app.test_request_context():
+            response = jsonify({'b': 1, 'a': [1, 2]})
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_data(), b'{"a":[1,2],"b":1}\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# project/tests/test_keys.py
+
+
+import json
+import unittest
+
+import jwt
+from flask import Flask
+
+from project.server import db, key_ring
+from project.server.keys import KeyRing
+from project.server.models import User
+from project.tests.base import BaseTestCase
+
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+except ImportError:
+    rsa = None
+
+
+def make_ring(**config):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='my_precious', **config)
+    return KeyRing(app)
+
+
+class TestKeyRing(BaseTestCase):
+
+    def test_token_has_kid_header(self):
+        user = User(email='test@test.com', password='test')
+        db.session.add(user)
+        db.session.commit()
+        auth_token = user.encode_auth_token(user.id)
+        self.assertEqual(jwt.get_unverified_header(auth_token)['kid'], 'default')
+        self.assertTrue(User.decode_auth_token(auth_token.decode()) == user.id)
+
+    def test_legacy_token_without_kid(self):
+        auth_token = jwt.encode(
+            {'sub': 5, 'exp': 4102444800}, 'my_precious', algorithm='HS256')
+        self.assertEqual(key_ring.decode(auth_token)['sub'], 5)
+
+    def test_unknown_kid_is_rejected(self):
+        auth_token = jwt.encode(
+            {'sub': 5}, 'my_precious', algorithm='HS256', headers={'kid': 'nope'})
+        self.assertEqual(User.decode_auth_token(auth_token.decode()),
+                         'Invalid token. Please log in again.')
+
+    def test_rotation_keeps_old_tokens_valid(self):
+        keys = [
+            {'kid': 'k1', 'algorithm': 'HS256', 'secret': 'first'},
+            {'kid': 'k2', 'algorithm': 'HS512', 'secret': 'second'},
+        ]
+        old_token = make_ring(JWT_KEYS=keys, JWT_SIGNING_KID='k1').encode({'sub': 1})
+        ring = make_ring(JWT_KEYS=keys, JWT_SIGNING_KID='k2')
+        new_token = ring.encode({'sub': 2})
+        self.assertEqual(jwt.get_unverified_header(new_token)['alg'], 'HS512')
+        self.assertEqual(ring.decode(old_token)['sub'], 1)
+        self.assertEqual(ring.decode(new_token)['sub'], 2)
+        self.assertEqual(ring.jwks(), {'keys': []})
+
+    @unittest.skipIf(rsa is None, 'cryptography is not installed')
+    def test_rsa_key_verifies_with_public_key_only(self):
+        private_key = rsa.generate_private_key(65537, 2048, default_backend())
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption())
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo)
+        signer = make_ring(JWT_KEYS=[
+            {'kid': 'rsa1', 'algorithm': 'RS256', 'private_key': private_pem}])
+        auth_token = signer.encode({'sub': 3})
+        verifier = make_ring(JWT_KEYS=[
+            {'kid': 'hmac', 'algorithm': 'HS256', 'secret': 'local'},
+            {'kid': 'rsa1', 'algorithm': 'RS256', 'public_key': public_pem}])
+        self.assertEqual(verifier.decode(auth_token)['sub'], 3)
+        jwk = signer.jwks()['keys'][0]
+        self.assertEqual((jwk['kid'], jwk['kty'], jwk['alg']),
+                         ('rsa1', 'RSA', 'RS256'))
+
+    def test_keys_endpoint(self):
+        """ Test that /auth/keys publishes no HMAC secrets """
+        with self.client:
+            response = self.client.get('/auth/keys')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.data.decode()), {'keys': []})
+            self.assertTrue('max-age=300' in response.headers['Cache-Control'])
+
+
+if __name__ == '__main__':
+    unittest.main()
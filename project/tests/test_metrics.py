@@ -0,0 +1,69 @@
+# project/tests/test_metrics.py
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from project.multiprocess import mark_process_dead
+from project.server import metrics, request_timing
+from project.server.models import User
+from project.tests.base import BaseTestCase
+from project.tests.helpers import auth_headers
+
+LIST_SERIES = 'http_requests_total{method="GET",rule="/product/list",status="200"}'
+
+
+class TestMetrics(BaseTestCase):
+
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        metrics.clear()
+        request_timing.clear()
+
+    def test_metrics_endpoint(self):
+        """ Test that /metrics exposes request, auth and cache metrics """
+        headers = auth_headers(self)
+        with self.client:
+            self.client.get('/product/list', headers=headers)
+            self.client.get('/product/list', headers=headers)
+            response = self.client.get('/metrics')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.content_type.startswith('text/plain'))
+            lines = response.data.decode().splitlines()
+            self.assertTrue(LIST_SERIES + ' 2' in lines)
+            self.assertTrue('auth_token_decode_total{outcome="valid"} 2' in lines)
+            self.assertTrue('cache_hits_total{cache="token"} 1' in lines)
+            self.assertTrue('# TYPE http_request_duration_seconds histogram' in lines)
+            self.assertTrue(
+                'http_request_duration_seconds_count{rule="/product/list"} 2' in lines)
+
+    def test_token_decode_outcomes(self):
+        User.decode_auth_payload('not-a-token')
+        samples = metrics.samples()
+        self.assertEqual(samples['auth_token_decode_total{outcome="invalid"}'], 1)
+
+    def test_workers_are_aggregated(self):
+        """ Test that samples from other worker files are summed """
+        directory = tempfile.mkdtemp()
+        metrics.directory = directory
+        try:
+            with open(os.path.join(directory, 'metrics_1.json'), 'w') as f:
+                json.dump({LIST_SERIES: 3, 'db_pool_idle{pid="1"}': 4}, f)
+            headers = auth_headers(self)
+            with self.client:
+                self.client.get('/product/list', headers=headers)
+            self.assertEqual(metrics.aggregate()[LIST_SERIES], 4)
+            mark_process_dead(directory, 1)
+            totals = metrics.aggregate()
+            self.assertEqual(totals[LIST_SERIES], 4)
+            self.assertTrue('db_pool_idle{pid="1"}' not in totals)
+        finally:
+            metrics.directory = None
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
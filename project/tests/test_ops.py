@@ -0,0 +1,52 @@
+# project/tests/test_ops.py
+
+
+import json
+import os
+import unittest
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from project.server import db, pool_monitor
+from project.tests.base import BaseTestCase
+
+
+class TestOpsBlueprint(BaseTestCase):
+
+    def test_pool_health(self):
+        """ Test for the connection pool report of this worker """
+        with self.client:
+            response = self.client.get('/health/pool')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(data['status'] == 'success')
+            self.assertEqual(data['data']['pid'], os.getpid())
+            for key in ('size', 'checked_out', 'idle', 'overflow'):
+                self.assertTrue(key in data['data'])
+
+    def test_pool_warm_up(self):
+        """ Test that warm up opens and returns connections """
+        self.assertEqual(pool_monitor.warm_up(2), 2)
+        self.assertEqual(pool_monitor.warm_up(0), 0)
+
+    def test_pre_ping_runs_on_checkout(self):
+        """ Test that connections are pinged before use """
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        pool_monitor.pre_ping = True
+        event.listen(Engine, 'before_cursor_execute', record)
+        try:
+            with db.engine.connect() as connection:
+                self.assertEqual(connection.scalar('select 2'), 2)
+        finally:
+            event.remove(Engine, 'before_cursor_execute', record)
+            pool_monitor.pre_ping = self.app.config['SQLALCHEMY_POOL_PRE_PING']
+        self.assertEqual(statements, ['SELECT 1', 'select 2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
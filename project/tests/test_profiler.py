@@ -0,0 +1,60 @@
+# project/tests/test_profiler.py
+
+
+import unittest
+
+from project.server import db, query_profiler
+from project.server.models import Product
+from project.tests.base import BaseTestCase
+from project.tests.helpers import auth_headers, add_products
+
+
+def take_violations():
+    violations = query_profiler.violations
+    query_profiler.violations = []
+    return violations
+
+
+class TestQueryProfiler(BaseTestCase):
+
+    def test_repeated_queries_are_flagged(self):
+        """ Test that identical queries in one request are reported as N+1 """
+        add_products(6)
+        ids = [product.id for product in Product.query.all()]
+        with self.app.test_request_context('/product/list', method='GET'):
+            self.app.preprocess_request()
+            for product_id in ids:
+                db.session.query(Product.nama).filter(Product.id == product_id).first()
+            self.app.process_response(self.app.response_class())
+        violations = take_violations()
+        self.assertEqual(len(violations), 1)
+        self.assertTrue(violations[0].startswith('Possible N+1 on GET /product/list: 6'))
+
+    def test_slow_query_logs_explain(self):
+        """ Test that slow queries are logged with their plan """
+        query_profiler.slow_threshold = 0
+        query_profiler.explain = True
+        with self.assertLogs('project.server.profiler', 'WARNING') as logs:
+            Product.query.filter_by(nama='product 0').first()
+        self.assertTrue(logs.output[0].startswith('WARNING:project.server.profiler:Slow query'))
+        self.assertTrue('\n' in logs.output[0])
+
+
+class TestQueryBudget(BaseTestCase):
+
+    query_budget = 1
+
+    def test_budget_is_enforced(self):
+        """ Test that requests above the query budget are reported """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.get('/product/list', headers=headers)
+            self.assertEqual(response.status_code, 200)
+        violations = take_violations()
+        self.assertEqual(len(violations), 1)
+        self.assertTrue(violations[0].startswith(
+            'Query budget exceeded on GET /product/list'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# project/tests/test_routing.py
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sqlalchemy
+from sqlalchemy.pool import QueuePool
+
+from project.server import db, replica_router, response_cache
+from project.server.models import Product
+from project.tests.base import BaseTestCase
+from project.tests.helpers import auth_headers
+
+
+class TestReplicaRouting(BaseTestCase):
+    """ Two SQLite files stand in for the read replicas """
+
+    def setUp(self):
+        super(TestReplicaRouting, self).setUp()
+        self.replica_dir = tempfile.mkdtemp()
+        self.saved_uris = self.app.config['SQLALCHEMY_REPLICA_URIS']
+        self.app.config['SQLALCHEMY_REPLICA_URIS'] = [
+            'sqlite:///' + os.path.join(self.replica_dir, name + '.db')
+            for name in ('replica1', 'replica2')
+        ]
+        replica_router.configure(self.app)
+        self.replicas = replica_router.engines
+        for name, engine in zip(('replica1', 'replica2'), self.replicas):
+            db.Model.metadata.create_all(engine)
+            engine.execute(Product.__table__.insert(), nama=name, harga=1, jumlah=1)
+
+    def tearDown(self):
+        self.app.config['SQLALCHEMY_REPLICA_URIS'] = self.saved_uris
+        replica_router.configure(self.app)
+        super(TestReplicaRouting, self).tearDown()
+        shutil.rmtree(self.replica_dir)
+
+    def test_get_reads_from_replica(self):
+        """ Test that product list is served by the replicas in turn """
+        headers = auth_headers(self)
+        with self.client:
+            names = set()
+            for _ in range(2):
+                response_cache.clear()
+                response = self.client.get('/product/list', headers=headers)
+                self.assertEqual(response.status_code, 200)
+                data = json.loads(response.data.decode())
+                names.update(row['data']['nama'] for row in data)
+            self.assertEqual(names, {'replica1', 'replica2'})
+
+    def test_post_writes_to_primary(self):
+        """ Test that writes never go to a replica """
+        headers = auth_headers(self)
+        with self.client:
+            response = self.client.post(
+                '/product',
+                data=json.dumps(dict(nama='primary', harga=1, jumlah=1)),
+                content_type='application/json',
+                headers=headers
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(db.engine.scalar('select nama from products'), 'primary')
+        for engine in self.replicas:
+            self.assertEqual(engine.scalar('select count(*) from products'), 1)
+
+    def test_read_after_write_pins_primary(self):
+        """ Test that reads after a flush in the same request use the primary """
+        with self.app.test_request_context('/product/list', method='GET'):
+            self.app.preprocess_request()
+            self.assertEqual(Product.query.count(), 1)
+            db.session.add(Product(nama='primary', harga=1, jumlah=1))
+            db.session.flush()
+            self.assertEqual([p.nama for p in Product.query.all()], ['primary'])
+            db.session.rollback()
+
+    def test_primary_block(self):
+        """ Test that reads inside session.primary() skip the replicas """
+        with self.app.test_request_context('/product/list', method='GET'):
+            self.app.preprocess_request()
+            with db.session().primary():
+                self.assertEqual(Product.query.count(), 0)
+            self.assertEqual(Product.query.count(), 1)
+
+    def test_lagging_replica_status(self):
+        """ Test that a user missing from a lagging replica is read from the primary """
+        with self.client:
+            response = self.client.post(
+                '/auth/register',
+                data=json.dumps(dict(email='joe@gmail.com', password='123456')),
+                content_type='application/json'
+            )
+            auth_token = json.loads(response.data.decode())['auth_token']
+            response = self.client.get(
+                '/auth/status', headers=dict(Authorization='Bearer ' + auth_token))
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['data']['email'], 'joe@gmail.com')
+
+    def test_least_loaded_selection(self):
+        """ Test that least_loaded skips the replica with open connections """
+        # SQLite file memakai NullPool yang tidak menghitung koneksi aktif
+        engines = [
+            sqlalchemy.create_engine(engine.url, poolclass=QueuePool)
+            for engine in self.replicas
+        ]
+        replica_router.engines = engines
+        replica_router.selection = 'least_loaded'
+        connection = engines[0].connect()
+        try:
+            for _ in range(3):
+                self.assertTrue(replica_router.select_engine() is engines[1])
+        finally:
+            connection.close()
+            for engine in engines:
+                engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
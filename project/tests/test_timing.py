@@ -0,0 +1,74 @@
+# project/tests/test_timing.py
+
+
+import json
+import unittest
+
+from project.server import request_timing
+from project.server.timing import Histogram
+from project.tests.base import BaseTestCase
+from project.tests.helpers import auth_headers, add_products
+
+
+def timing_metrics(response):
+    metrics = {}
+    for metric in response.headers['Server-Timing'].split(', '):
+        parts = metric.split(';')
+        metrics[parts[0]] = dict(part.split('=', 1) for part in parts[1:])
+    return metrics
+
+
+class TestRequestTiming(BaseTestCase):
+
+    def setUp(self):
+        super(TestRequestTiming, self).setUp()
+        request_timing.clear()
+
+    def test_server_timing_header(self):
+        """ Test that protected lists report auth, db and serialize phases """
+        headers = auth_headers(self)
+        add_products(3)
+        with self.client:
+            response = self.client.get('/product/list', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            metrics = timing_metrics(response)
+            for name in ('auth', 'db', 'serialize', 'total'):
+                self.assertTrue(float(metrics[name]['dur']) >= 0)
+            self.assertNotEqual(metrics['db']['desc'], '"0 queries"')
+
+    def test_login_reports_hash_phase(self):
+        """ Test that bcrypt time is reported on login """
+        with self.client:
+            self.client.post(
+                '/auth/register',
+                data=json.dumps(dict(email='joe@gmail.com', password='123456')),
+                content_type='application/json'
+            )
+            response = self.client.post(
+                '/auth/login',
+                data=json.dumps(dict(email='joe@gmail.com', password='123456')),
+                content_type='application/json'
+            )
+            self.assertTrue('hash' in timing_metrics(response))
+
+    def test_histogram_per_endpoint(self):
+        """ Test that request durations are kept per url rule """
+        headers = auth_headers(self)
+        with self.client:
+            self.client.get('/product/list', headers=headers)
+            self.client.get('/product/list', headers=headers)
+            response = self.client.get('/health/timing')
+            data = json.loads(response.data.decode())['data']
+            self.assertEqual(data['/product/list']['count'], 2)
+            self.assertEqual(data['/product/list']['buckets'][-1], ['+Inf', 2])
+
+    def test_histogram_buckets(self):
+        histogram = Histogram((10, 100))
+        for value in (1, 10, 50, 1000):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot()['buckets'],
+                         [[10, 2], [100, 3], ['+Inf', 4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
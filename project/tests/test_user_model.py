@@ -2,10 +2,14 @@
 
 
 
+import datetime
 import unittest
 
-from project.server import db
-from project.server.models import User
+from project.server import db, token_cache
+from project.server.models import (
+    User, BlacklistToken, RefreshToken, blacklist_index
+)
+from project.server.tokens import token_digest
 from project.tests.base import BaseTestCase
 
 
@@ -34,6 +38,175 @@ class TestUserModel(BaseTestCase):
         self.assertTrue(User.decode_auth_token(
             auth_token.decode("utf-8") ) == 1)
 
+    def test_decode_auth_token_is_cached(self):
+        user = User(
+            email='test@test.com',
+            password='test'
+        )
+        db.session.add(user)
+        db.session.commit()
+        auth_token = user.encode_auth_token(user.id).decode()
+        self.assertTrue(User.decode_auth_token(auth_token) == 1)
+        self.assertTrue(User.decode_auth_token(auth_token) == 1)
+        stats = token_cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_cached_token_blacklisted_elsewhere(self):
+        """ A cached token blacklisted by another worker is rejected at once """
+        user = User(email='test@test.com', password='test')
+        db.session.add(user)
+        db.session.commit()
+        auth_token = user.encode_auth_token(user.id).decode()
+        self.assertTrue(User.decode_auth_token(auth_token) == 1)
+        # baris blacklist dari worker lain, cache worker ini tidak dihapus
+        db.session.add(BlacklistToken(token=auth_token))
+        db.session.commit()
+        self.assertEqual(token_cache.stats()['size'], 1)
+        self.assertEqual(User.decode_auth_token(auth_token),
+                         'Token blacklisted. Please log in again.')
+
+    def test_auth_token_user_claims(self):
+        self.app.config['JWT_USER_CLAIMS'] = True
+        try:
+            user = User(
+                email='test@test.com',
+                password='test',
+                admin=True
+            )
+            db.session.add(user)
+            db.session.commit()
+            auth_token = user.encode_auth_token(user.id).decode()
+        finally:
+            self.app.config['JWT_USER_CLAIMS'] = False
+        claims = User.user_claims(User.decode_auth_payload(auth_token))
+        self.assertEqual(claims['email'], 'test@test.com')
+        self.assertTrue(claims['admin'])
+        self.assertEqual(claims['registered_on'], user.registered_on)
+
+    def test_password_hash_uses_configured_rounds(self):
+        user = User(
+            email='test@test.com',
+            password='test'
+        )
+        rounds = '${:02d}$'.format(self.app.config['BCRYPT_LOG_ROUNDS'])
+        self.assertEqual(user.password[3:7], rounds)
+
+    def test_user_change_revokes_claims_token(self):
+        self.app.config['JWT_USER_CLAIMS'] = True
+        try:
+            user = User(
+                email='test@test.com',
+                password='test'
+            )
+            db.session.add(user)
+            db.session.commit()
+            auth_token = user.encode_auth_token(user.id).decode()
+        finally:
+            self.app.config['JWT_USER_CLAIMS'] = False
+        self.assertTrue(User.decode_auth_token(auth_token) == 1)
+        user.admin = True
+        db.session.commit()
+        self.assertEqual(user.token_version, 1)
+        self.assertEqual(User.decode_auth_token(auth_token),
+                         'Token revoked. Please log in again.')
+
+    def test_user_change_only_drops_own_cached_tokens(self):
+        users = [User(email='%d@test.com' % i, password='test') for i in range(2)]
+        db.session.add_all(users)
+        db.session.commit()
+        tokens = [user.encode_auth_token(user.id).decode() for user in users]
+        for auth_token in tokens:
+            User.decode_auth_token(auth_token)
+            User.decode_auth_token(auth_token)
+        self.assertEqual(token_cache.stats()['hits'], 2)
+        users[0].admin = True
+        db.session.commit()
+        self.assertIsNone(token_cache.get(tokens[0]))
+        self.assertIsNotNone(token_cache.get(tokens[1]))
+        # counter tidak mundur (dipakai sebagai counter Prometheus)
+        self.assertEqual(token_cache.stats()['hits'], 3)
+
+    def test_refresh_token_stored_as_digest(self):
+        user = User(
+            email='test@test.com',
+            password='test'
+        )
+        db.session.add(user)
+        db.session.commit()
+        refresh_token = RefreshToken.issue(user)
+        db.session.commit()
+        row = RefreshToken.query.first()
+        self.assertEqual(row.token_hash, token_digest(refresh_token))
+        self.assertEqual(RefreshToken.prune_expired(), 0)
+        self.assertEqual(RefreshToken.prune_expired(
+            now=row.expires_at + datetime.timedelta(seconds=1)), 1)
+
+    def test_check_blacklist_uses_index(self):
+        self.assertFalse(BlacklistToken.check_blacklist('not-blacklisted'))
+        self.assertEqual(blacklist_index.stats()['negatives'], 1)
+        db.session.add(BlacklistToken(token='blacklisted'))
+        db.session.commit()
+        self.assertTrue(BlacklistToken.check_blacklist('blacklisted'))
+        self.assertEqual(blacklist_index.stats()['positives'], 1)
+
+    def test_blacklist_index_delta_sync(self):
+        blacklist_index.sync(force=True)
+        # token diblacklist oleh worker lain, langsung lewat database
+        db.engine.execute(BlacklistToken.__table__.insert().values(
+            token_hash=token_digest('from-other-worker'),
+            blacklisted_on=datetime.datetime.now(),
+            expires_at=datetime.datetime.utcnow()
+        ))
+        blacklist_index.sync(force=True)
+        self.assertTrue(blacklist_index.might_contain('from-other-worker'))
+        self.assertTrue(BlacklistToken.check_blacklist('from-other-worker'))
+
+    def test_blacklist_index_periodic_rebuild(self):
+        db.session.add(BlacklistToken(token='pruned-elsewhere'))
+        db.session.commit()
+        self.assertTrue(blacklist_index.might_contain('pruned-elsewhere'))
+        # baris dihapus oleh prune di worker lain
+        db.engine.execute(BlacklistToken.__table__.delete())
+        blacklist_index._next_rebuild = 0
+        self.assertFalse(blacklist_index.might_contain('pruned-elsewhere'))
+        self.assertEqual(blacklist_index.stats()['size'], 0)
+
+    def test_blacklist_stores_digest_and_expiry(self):
+        user = User(
+            email='test@test.com',
+            password='test'
+        )
+        db.session.add(user)
+        db.session.commit()
+        auth_token = user.encode_auth_token(user.id).decode()
+        db.session.add(BlacklistToken(token=auth_token))
+        db.session.commit()
+        blacklist_token = BlacklistToken.query.first()
+        self.assertEqual(blacklist_token.token_hash, token_digest(auth_token))
+        self.assertTrue(
+            blacklist_token.expires_at > datetime.datetime.utcnow())
+
+    def test_prune_expired_blacklist_tokens(self):
+        user = User(
+            email='test@test.com',
+            password='test'
+        )
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(BlacklistToken(token='expired-1'))
+        db.session.add(BlacklistToken(token='expired-2'))
+        db.session.add(BlacklistToken(
+            token=user.encode_auth_token(user.id).decode()))
+        db.session.commit()
+        now = datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+        self.assertEqual(BlacklistToken.prune_expired(batch_size=1, now=now), 2)
+        self.assertEqual(BlacklistToken.query.count(), 1)
+        # index ikut dibangun ulang tanpa token yang sudah dihapus
+        self.assertEqual(blacklist_index.stats()['size'], 1)
+        self.assertFalse(blacklist_index.might_contain('expired-1'))
+
 
 if __name__ == '__main__':
     unittest.main()